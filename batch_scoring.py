@@ -0,0 +1,274 @@
+# batch_scoring.py
+# Batch inference for models trained on the Machine Learning page.
+#
+# Usage (command line):
+#   python batch_scoring.py models/<name>.joblib input.csv predictions.parquet --workers 4
+import argparse
+import multiprocessing
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+MODELS_DIR = "models"
+PREDICTIONS_DIR = "predictions"
+# Large CSVs to score are copied here on the server; the page only reads files from this directory
+INPUTS_DIR = os.environ.get("DATASTAT_SCORING_INPUTS", "scoring_inputs")
+
+# Loaded once per worker process by _init_worker
+_bundle = None
+
+
+# --------------------
+# Model registry
+# --------------------
+def register_model(model, target, features, problem_type, engine, models_dir=MODELS_DIR):
+    """Save a trained model with the columns it expects; returns the file path."""
+    os.makedirs(models_dir, exist_ok=True)
+    # The random suffix keeps two registrations in the same second from overwriting each other
+    stamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    name = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{target}_{engine}_{stamp}")
+    path = os.path.join(models_dir, f"{name}.joblib")
+    joblib.dump({
+        "model": model,
+        "target": target,
+        "features": list(features),
+        "problem_type": problem_type,
+        "engine": engine,
+        "created_at": time.time(),
+    }, path)
+    return path
+
+
+def list_models(models_dir=MODELS_DIR):
+    if not os.path.isdir(models_dir):
+        return []
+    paths = [os.path.join(models_dir, f) for f in os.listdir(models_dir) if f.endswith(".joblib")]
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def list_inputs(inputs_dir=INPUTS_DIR):
+    """CSV files directly inside `inputs_dir`, newest first."""
+    if not os.path.isdir(inputs_dir):
+        return []
+    paths = [os.path.join(inputs_dir, f) for f in os.listdir(inputs_dir) if f.lower().endswith(".csv")]
+    return sorted((p for p in paths if os.path.isfile(p)), key=os.path.getmtime, reverse=True)
+
+
+def output_path_for(model_path, fmt, predictions_dir=PREDICTIONS_DIR):
+    """A new output file per run, so concurrent runs of the same model never share a file."""
+    name = os.path.splitext(os.path.basename(model_path))[0]
+    stamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    return os.path.join(predictions_dir, f"{name}_predictions_{stamp}.{fmt}")
+
+
+# --------------------
+# Scoring
+# --------------------
+def _init_worker(model_path):
+    global _bundle
+    _bundle = joblib.load(model_path)
+
+
+def _score_chunk(chunk):
+    predictions = _bundle["model"].predict(chunk[_bundle["features"]])
+    chunk = chunk.copy()
+    chunk["prediction"] = predictions
+    return chunk
+
+
+class _OutputWriter:
+    """Appends scored chunks to a CSV or Parquet file as they arrive.
+
+    Chunks go to a temporary file next to `path`, which replaces `path` only
+    when commit() is called, so a failed run never leaves a partial output.
+    """
+
+    def __init__(self, path, fmt):
+        if fmt == "parquet" and pq is None:
+            raise ImportError("Writing Parquet requires pyarrow.")
+        self.path, self.fmt = path, fmt
+        self.partial_path = f"{path}.partial-{uuid.uuid4().hex}"
+        self._parquet = None
+        self._header = True
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def write(self, chunk):
+        if self.fmt == "csv":
+            chunk.to_csv(self.partial_path, mode="w" if self._header else "a", header=self._header, index=False)
+            self._header = False
+            return
+        if self._parquet is None:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            self._parquet = pq.ParquetWriter(self.partial_path, table.schema)
+        else:
+            table = pa.Table.from_pandas(chunk, schema=self._parquet.schema, preserve_index=False)
+        self._parquet.write_table(table)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+    def commit(self):
+        self.close()
+        if os.path.exists(self.partial_path):
+            os.replace(self.partial_path, self.path)
+
+    def discard(self):
+        self.close()
+        if os.path.exists(self.partial_path):
+            os.remove(self.partial_path)
+
+
+class _ColumnDrift(Exception):
+    """A later chunk holds values that do not fit a column's pinned dtype."""
+
+    def __init__(self, column, dtype):
+        super().__init__(f"column {column!r} needs {dtype}")
+        self.column, self.dtype = column, dtype
+
+
+def _pin_dtypes(chunk, features, overrides):
+    """Dtypes for every column, inferred from the first chunk.
+
+    Integers and booleans use pandas' nullable dtypes, so missing values in a
+    later chunk do not change them. `overrides` holds columns that drifted on
+    an earlier attempt.
+    """
+    dtypes = {}
+    for column, dtype in chunk.dtypes.items():
+        if column in features:
+            dtypes[column] = "float64"
+        elif column in overrides:
+            dtypes[column] = overrides[column]
+        elif not pd.api.types.is_numeric_dtype(dtype):
+            dtypes[column] = "string"
+        elif pd.api.types.is_bool_dtype(dtype):
+            dtypes[column] = "boolean"
+        elif pd.api.types.is_integer_dtype(dtype):
+            dtypes[column] = "Int64"
+        else:
+            # Also columns that are empty in the first chunk; a later text value makes them drift
+            dtypes[column] = "float64"
+    return dtypes
+
+
+def _conform(chunk, dtypes):
+    """Cast `chunk` to the pinned dtypes, raising _ColumnDrift for a column that no longer fits."""
+    for column, dtype in dtypes.items():
+        if chunk[column].dtype == dtype:
+            continue
+        try:
+            chunk[column] = chunk[column].astype(dtype)
+        except (TypeError, ValueError):
+            # Whole numbers that became fractional widen to float; anything else becomes text
+            widen = dtype == "Int64" and pd.api.types.is_float_dtype(chunk[column].dtype)
+            raise _ColumnDrift(column, "float64" if widen else "string") from None
+    return chunk
+
+
+def score_file(model_path, source, output_path, fmt=None, chunksize=100_000, workers=None, progress=None):
+    """Stream `source` (CSV path or seekable file object) through a registered model.
+
+    The input is read `chunksize` rows at a time, chunks are predicted in
+    worker processes, and predictions are appended to `output_path` in input
+    order, so memory stays bounded by a few chunks regardless of file size.
+    Column dtypes are pinned from the first chunk; if a later chunk does not
+    fit (e.g. text in a column that started out empty), the run restarts with
+    that column widened. `progress(rows_done, seconds, fraction_done)` is
+    called after each chunk is written, with the fraction measured in bytes.
+    Returns rows, seconds and rows_per_second.
+    """
+    fmt = fmt or ("parquet" if output_path.endswith(".parquet") else "csv")
+    workers = workers or os.cpu_count() or 1
+    # The bundle is loaded here only for its feature list; workers load their own copy
+    features = joblib.load(model_path)["features"]
+
+    handle = open(source, "rb") if isinstance(source, (str, os.PathLike)) else source
+    try:
+        begin = handle.tell()
+        size = handle.seek(0, os.SEEK_END) - begin
+        overrides = {}
+        while True:
+            handle.seek(begin)
+            try:
+                return _score_stream(model_path, handle, begin, size, output_path, fmt, chunksize,
+                                     workers, progress, features, overrides)
+            except _ColumnDrift as drift:
+                overrides[drift.column] = drift.dtype
+    finally:
+        if handle is not source:
+            handle.close()
+
+
+def _score_stream(model_path, handle, begin, size, output_path, fmt, chunksize, workers, progress,
+                  features, overrides):
+    max_pending = workers * 2
+    read_dtypes = {c: "float64" for c in features}
+    read_dtypes.update(overrides)
+    dtypes = None
+    writer = _OutputWriter(output_path, fmt)
+    rows, start = 0, time.perf_counter()
+
+    def drain(item):
+        nonlocal rows
+        future, fraction = item
+        scored = future.result()
+        writer.write(scored)
+        rows += len(scored)
+        if progress:
+            progress(rows, time.perf_counter() - start, fraction)
+
+    # "spawn" keeps workers independent of the Streamlit server's threads
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(model_path,)) as pool:
+            pending = []
+            # Closing the reader explicitly keeps it from closing `handle` when a drift abandons it
+            with pd.read_csv(handle, chunksize=chunksize, dtype=read_dtypes) as reader:
+                for chunk in reader:
+                    if dtypes is None:
+                        dtypes = _pin_dtypes(chunk, features, overrides)
+                    chunk = _conform(chunk, dtypes)
+                    # The reader runs ahead of the writer, so note how far it had got for this chunk
+                    fraction = min((handle.tell() - begin) / size, 1.0) if size else 1.0
+                    pending.append((pool.submit(_score_chunk, chunk), fraction))
+                    if len(pending) >= max_pending:
+                        drain(pending.pop(0))
+            for item in pending:
+                drain(item)
+    except BaseException:
+        writer.discard()
+        raise
+    writer.commit()
+
+    seconds = time.perf_counter() - start
+    return {"rows": rows, "seconds": seconds, "rows_per_second": rows / seconds if seconds else 0.0}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a CSV file with a registered model.")
+    parser.add_argument("model")
+    parser.add_argument("input")
+    parser.add_argument("output", help="output .csv or .parquet file")
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    stats = score_file(
+        args.model, args.input, args.output, chunksize=args.chunksize, workers=args.workers,
+        progress=lambda n, s, f: print(f"\r{f:.0%}  {n:,} rows  {n / s:,.0f} rows/s", end="", flush=True),
+    )
+    print(f"\nScored {stats['rows']:,} rows in {stats['seconds']:.1f}s ({stats['rows_per_second']:,.0f} rows/s)")
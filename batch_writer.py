@@ -0,0 +1,115 @@
+# batch_writer.py
+# One background thread that writes queued items in batches (quiz scores, experiment runs).
+#
+#   writer = BatchWriter(lambda rows: insert_many(rows), name="score-writer")
+#   writer.submit(row)          # returns immediately
+#   writer.flush()              # True once everything submitted so far is written
+#
+# A batch whose write raises is retried with exponential backoff; if it still
+# fails it is dropped and logged, the thread keeps running, and the next flush()
+# returns False.
+import atexit
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class _FlushRequest:
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = True
+
+
+class BatchWriter:
+    """Calls `write_batch(items)` on a background thread with up to `batch_size` queued items.
+
+    `on_close()` runs on that thread after the last batch, e.g. to close a
+    connection that `write_batch` opened there.
+    """
+
+    def __init__(self, write_batch, name="batch-writer", batch_size=200, flush_interval=0.5,
+                 max_attempts=3, retry_delay=0.5, on_close=None):
+        self.write_batch = write_batch
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.on_close = on_close
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, item):
+        self._queue.put(item)
+
+    def _write(self, items):
+        """Write one batch, retrying with backoff; returns False if the items were dropped."""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.write_batch(items)
+                return True
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    logger.exception("%s: dropped %d items after %d attempts", self.name, len(items), attempt)
+                    return False
+                logger.warning("%s: write of %d items failed (attempt %d), retrying: %s",
+                               self.name, len(items), attempt, e)
+                time.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+    def _run(self):
+        stop = False
+        # False once a batch is dropped; reported to (and reset by) the next flush()
+        all_written = True
+        while not stop:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            items, requests = [], []
+            while item is not None:
+                if isinstance(item, _FlushRequest):
+                    requests.append(item)
+                elif item is _STOP:
+                    stop = True
+                else:
+                    items.append(item)
+                if len(items) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+            if items and not self._write(items):
+                all_written = False
+            for request in requests:
+                request.ok = all_written
+                request.done.set()
+            if requests:
+                all_written = True
+        if self.on_close is not None:
+            try:
+                self.on_close()
+            except Exception:
+                logger.exception("%s: close failed", self.name)
+
+    def flush(self, timeout=10):
+        """Block until every item submitted so far is written.
+
+        Returns False if that takes longer than `timeout` or if any of those
+        items could not be written (the error is logged).
+        """
+        request = _FlushRequest()
+        self._queue.put(request)
+        return request.done.wait(timeout) and request.ok
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=10)
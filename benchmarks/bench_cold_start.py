@@ -0,0 +1,98 @@
+# benchmarks/bench_cold_start.py
+# Cold start of every page: import time and time to first render, each page in a fresh process.
+#
+#   python benchmarks/bench_cold_start.py [--pages simulation ai] [--json cold_start.json]
+#
+# "first render" is one headless AppTest run of the page with no input, i.e. what a
+# user opening the page sees. "imports" is the part of it spent in import
+# statements (outermost imports only, so nested imports are not double counted).
+# Streamlit's own import is measured separately as "framework".
+import argparse
+import builtins
+import glob
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ["shap", "sklearn", "xgboost", "statsmodels", "seaborn", "matplotlib.pyplot", "scipy.stats", "altair",
+         "torch", "transformers", "PyPDF2", "docx"]
+
+
+def page_files():
+    return [os.path.join(ROOT, "main.py")] + sorted(glob.glob(os.path.join(ROOT, "pages", "*.py")))
+
+
+def child(path):
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    framework = time.perf_counter() - start
+
+    state = threading.local()
+    spent = [0.0]
+    original_import = builtins.__import__
+
+    def timed_import(*args, **kwargs):
+        if getattr(state, "inside", False):
+            return original_import(*args, **kwargs)
+        state.inside = True
+        t = time.perf_counter()
+        try:
+            return original_import(*args, **kwargs)
+        finally:
+            spent[0] += time.perf_counter() - t
+            state.inside = False
+
+    builtins.__import__ = timed_import
+    sys.path.insert(0, ROOT)
+    at = AppTest.from_file(path, default_timeout=300)
+    at.secrets["POE_API_KEY"] = "bench"
+    start = time.perf_counter()
+    at.run()
+    first_render = time.perf_counter() - start
+    builtins.__import__ = original_import
+
+    print(json.dumps({
+        "page": os.path.relpath(path, ROOT),
+        "framework_seconds": framework,
+        "import_seconds": spent[0],
+        "first_render_seconds": first_render,
+        "heavy_loaded": [m for m in HEAVY if m in sys.modules],
+        "error": str(at.exception[0].message) if at.exception else None,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", nargs="*", help="substrings of page file names (default: all)")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child)
+
+    paths = [p for p in page_files() if not args.pages or any(s in os.path.basename(p) for s in args.pages)]
+    results = []
+    print(f"{'page':<42} {'framework':>9} {'imports':>9} {'render':>9}  heavy modules loaded")
+    for path in paths:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", path], cwd=ROOT,
+                              capture_output=True, text=True, encoding="utf-8")
+        if proc.returncode != 0:
+            print(f"{os.path.relpath(path, ROOT):<42} failed: {proc.stderr.strip().splitlines()[-1:]}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        results.append(r)
+        note = f"  (page error: {r['error'][:40]})" if r["error"] else ""
+        print(f"{r['page']:<42} {r['framework_seconds']:8.2f}s {r['import_seconds']:8.2f}s "
+              f"{r['first_render_seconds']:8.2f}s  {', '.join(r['heavy_loaded']) or '-'}{note}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
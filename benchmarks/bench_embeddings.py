@@ -0,0 +1,85 @@
+# benchmarks/bench_embeddings.py
+# Embedding throughput and vector search latency for the semantic FAQ index.
+#
+#   python benchmarks/bench_embeddings.py [--pages 100] [--vectors 5000 100000]
+#
+# Indexing throughput needs the embedding model in the local cache
+# (`python embeddings.py download`); search latency is measured on random
+# unit vectors and runs without it.
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import embeddings  # noqa: E402
+from retrieval import chunk_text  # noqa: E402
+from bench_retrieval import make_document, percentiles  # noqa: E402
+
+
+def bench_indexing(pages, batch_size):
+    try:
+        embedder = embeddings.Embedder()
+    except embeddings.EmbeddingUnavailable as e:
+        print(f"indexing: skipped ({e})")
+        return None
+    chunks = chunk_text(make_document(pages))
+    with tempfile.TemporaryDirectory() as root:
+        index, stats = embeddings.VectorIndex.build(os.path.join(root, "doc"), chunks, embedder,
+                                                    batch_size=batch_size)
+        print(f"indexing: {stats['chunks']} chunks in {stats['seconds']:.1f}s "
+              f"({stats['chunks_per_second']:.1f} chunks/s, batch {batch_size})")
+        timings = []
+        for q in ["What is price elasticity of demand?", "ما هو التوازن في السوق؟"] * 10:
+            t0 = time.perf_counter()
+            index.search(q, embedder)
+            timings.append(time.perf_counter() - t0)
+        stats = percentiles(timings)
+        print(f"end-to-end query (encode + search): p50 {stats['p50_ms']:.1f} ms  p95 {stats['p95_ms']:.1f} ms")
+    return embedder
+
+
+def bench_search(n_vectors, dim=384, queries=200):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(n_vectors, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    chunks = [f"chunk {i}" for i in range(n_vectors)]
+
+    class FixedEmbedder:
+        def encode(self, texts, batch_size=32):
+            start = int(texts[0].split()[1])
+            return vectors[start:start + len(texts)]
+
+    with tempfile.TemporaryDirectory() as root:
+        index, _ = embeddings.VectorIndex.build(os.path.join(root, "doc"), chunks, FixedEmbedder(),
+                                                batch_size=4096)
+        mode = "ivf" if index.centroids is not None else "brute force"
+        qs = rng.normal(size=(queries, dim)).astype(np.float32)
+        qs /= np.linalg.norm(qs, axis=1, keepdims=True)
+        timings = []
+        for q in qs:
+            t0 = time.perf_counter()
+            index.search_vector(q)
+            timings.append(time.perf_counter() - t0)
+        stats = percentiles(timings)
+        print(f"search {n_vectors:>8,} vectors ({mode}): p50 {stats['p50_ms']:.2f} ms  p95 {stats['p95_ms']:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--vectors", type=int, nargs="+", default=[5_000, 100_000])
+    args = parser.parse_args()
+
+    bench_indexing(args.pages, args.batch_size)
+    for n in args.vectors:
+        bench_search(n)
+
+
+if __name__ == "__main__":
+    main()
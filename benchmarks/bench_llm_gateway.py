@@ -0,0 +1,77 @@
+# benchmarks/bench_llm_gateway.py
+# Offline load test of the LLM gateway.
+#
+#   python benchmarks/bench_llm_gateway.py [--requests 500] [--concurrency 64] [--failure-rate 0.05]
+#   python benchmarks/bench_llm_gateway.py --stub      # through PoeBackend against the local SSE stub
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm_gateway  # noqa: E402
+import stub_poe_server  # noqa: E402
+
+
+async def run(gateway, backend, n_requests, concurrency, url=None):
+    # Client-side concurrency; the gateway's per-backend semaphore caps what reaches the provider
+    limit = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with limit:
+            try:
+                await gateway.acomplete(backend, "load-test", [{"role": "user", "content": f"question {i}"}],
+                                        api_key="stub", url=url)
+            except Exception:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n_requests)))
+    return time.perf_counter() - start, errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--backend-limit", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--stub", action="store_true", help="use PoeBackend against the local stub server")
+    args = parser.parse_args()
+
+    gateway = llm_gateway.Gateway(backoff_base=0.05, backoff_cap=0.5)
+    url, server = None, None
+    if args.stub:
+        server, url = stub_poe_server.start(first_token_delay=args.latency, token_delay=0.0)
+        backend = gateway.register(llm_gateway.PoeBackend(max_concurrency=args.backend_limit)).name
+    else:
+        backend = gateway.register(llm_gateway.MockBackend(
+            latency=args.latency, failure_rate=args.failure_rate, max_concurrency=args.backend_limit, seed=0)).name
+
+    # asyncio.to_thread runs on the default executor; make it large enough for the client concurrency
+    loop = asyncio.new_event_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=args.concurrency))
+    try:
+        seconds, errors = loop.run_until_complete(run(gateway, backend, args.requests, args.concurrency, url))
+    finally:
+        loop.close()
+        if server:
+            server.shutdown()
+
+    m = gateway.metrics()[backend]
+    print(f"{args.requests} requests via '{backend}' (client concurrency {args.concurrency}, "
+          f"backend limit {args.backend_limit})")
+    print(f"  throughput   {args.requests / seconds:8.1f} req/s   wall {seconds:.2f}s")
+    print(f"  latency      p50 {m['p50_seconds'] * 1000:.0f} ms   p95 {m['p95_seconds'] * 1000:.0f} ms")
+    print(f"  retries {m['retries']}   failed calls {errors}   "
+          f"tokens in/out {m['prompt_tokens']}/{m['completion_tokens']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_login.py
+# Cold session start and login latency with many users.
+#
+#   python benchmarks/bench_login.py [--users 1000] [--legacy-sample 10]
+#
+# The old main.py re-hashed every user's password with a new salt on each new
+# session. Timing that for 1,000 users takes minutes, so it is measured on
+# --legacy-sample users and extrapolated.
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import bcrypt
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import credentials  # noqa: E402
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+def session_start():
+    # A fresh AppTest is a fresh session; st.cache_resource is shared across them in this process
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(MAIN, default_timeout=600)
+    at.run()
+    assert not at.exception, at.exception
+
+
+def write_config(path, n_users, rounds):
+    # Hashing 1,000 passwords at full cost just to build the fixture is slow; only
+    # the user who logs in needs the production cost factor
+    users = {f"user{i}": {"name": f"User {i}", "password": credentials.hash_password(f"pw{i}", rounds=4)}
+             for i in range(n_users)}
+    users["user0"]["password"] = credentials.hash_password("pw0", rounds=rounds)
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump({"credentials": {"usernames": users}}, f)
+
+
+def timed(fn, repeat=1):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--legacy-sample", type=int, default=10)
+    args = parser.parse_args()
+
+    per_hash = timed(lambda: [bcrypt.hashpw(b"pw", bcrypt.gensalt(args.rounds))
+                              for _ in range(args.legacy_sample)]) / args.legacy_sample
+    legacy_session = per_hash * args.users
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "config.yaml")
+        write_config(path, args.users, args.rounds)
+        store = None
+
+        def load():
+            nonlocal store
+            store = credentials.CredentialStore.from_yaml(path)
+
+        process_load = timed(load)
+        first_login = timed(lambda: store.verify("user0", "pw0"))
+        repeat_login = timed(lambda: store.verify("user0", "pw0"), repeat=100)
+        wrong_password = timed(lambda: store.verify("user0", "nope"))
+
+        # main.py reads config.yaml from the working directory
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            first_session = timed(session_start)
+            next_session = timed(session_start, repeat=5)
+        finally:
+            os.chdir(cwd)
+
+    print(f"{args.users} users, bcrypt cost {args.rounds}")
+    print(f"  legacy cold session      {legacy_session:9.2f} s   (re-hash all users, extrapolated)")
+    print(f"  store load (per process) {process_load * 1000:9.1f} ms")
+    print(f"  first session (main.py)  {first_session * 1000:9.1f} ms   (includes Streamlit warm-up)")
+    print(f"  cold session start       {next_session * 1000:9.1f} ms   (store shared through st.cache_resource)")
+    print(f"  first login              {first_login * 1000:9.1f} ms")
+    print(f"  repeat login (cached)    {repeat_login * 1000:9.3f} ms")
+    print(f"  wrong password           {wrong_password * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
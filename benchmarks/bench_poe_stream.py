@@ -0,0 +1,69 @@
+# benchmarks/bench_poe_stream.py
+# Time-to-first-token and total latency of POE chat calls against the local stub.
+#
+#   python benchmarks/bench_poe_stream.py [--calls 20]
+#
+# Compares the old path (new connection, blocking request, then fake word-by-word
+# "streaming" with a 30 ms sleep per word) with real SSE streaming over the
+# shared keep-alive session.
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm_gateway  # noqa: E402
+import stub_poe_server  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "What is price elasticity of demand?"}]
+
+
+def legacy_call(url):
+    start = time.perf_counter()
+    res = requests.post(url, headers={"Authorization": "Bearer stub", "Content-Type": "application/json"},
+                        json={"model": "stub", "messages": MESSAGES}, timeout=60)
+    res.raise_for_status()
+    text = res.json()["choices"][0]["message"]["content"]
+    first = None
+    for _ in text.split():
+        if first is None:
+            first = time.perf_counter() - start
+        time.sleep(0.03)
+    return first, time.perf_counter() - start
+
+
+def streaming_call(url):
+    stream = llm_gateway.get_gateway().stream("poe", "stub", MESSAGES, api_key="stub", url=url)
+    for _ in stream:
+        pass
+    return stream.time_to_first_token, stream.total_seconds
+
+
+def report(name, results):
+    ttft = [r[0] for r in results]
+    total = [r[1] for r in results]
+    print(f"{name:<22} ttft p50 {statistics.median(ttft) * 1000:7.1f} ms   "
+          f"total p50 {statistics.median(total) * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--first-token-delay", type=float, default=0.2)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    server, url = stub_poe_server.start(first_token_delay=args.first_token_delay, token_delay=args.token_delay)
+    try:
+        report("legacy (fake stream)", [legacy_call(url) for _ in range(args.calls)])
+        report("sse stream (pooled)", [streaming_call(url) for _ in range(args.calls)])
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_retrieval.py
+# FAQ retrieval latency on a synthetic 1,000-page course document.
+#
+#   python benchmarks/bench_retrieval.py [--pages 1000] [--queries 200]
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retrieval import BM25Index, chunk_text, document_hash  # noqa: E402
+
+WORDS_EN = ("demand supply elasticity price quantity market equilibrium marginal cost revenue profit "
+            "utility consumer producer surplus tax subsidy inflation interest rate derivative integral "
+            "matrix function optimization constraint lagrange gradient monopoly oligopoly welfare").split()
+WORDS_AR = "الطلب العرض المرونة السعر الكمية السوق التوازن التكلفة الحدية الإيراد الربح المنفعة المستهلك".split()
+
+
+def make_document(pages, chars_per_page=3000, seed=0):
+    rng = random.Random(seed)
+    vocab = WORDS_EN + WORDS_AR + [f"term{i}" for i in range(5000)]
+    out = []
+    for page in range(pages):
+        words, size = [], 0
+        while size < chars_per_page:
+            word = rng.choice(vocab)
+            words.append(word)
+            size += len(word) + 1
+        out.append(f"Page {page + 1}\n" + " ".join(words))
+    return "\n\n".join(out)
+
+
+def legacy_search(question, text, top_k=5):
+    """The FAQ bot's original per-question path: re-chunk, substring match, full sort."""
+    chunks = chunk_text(text)
+    q_tokens = [t for t in question.lower().split() if len(t) > 1]
+    scored = [(sum(1 for t in q_tokens if t in c.lower()), c) for c in chunks]
+    return [c for s, c in sorted(scored, reverse=True)[:top_k] if s > 0]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "p50_ms": statistics.median(samples) * 1000,
+        "p95_ms": samples[int(0.95 * (len(samples) - 1))] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--legacy-queries", type=int, default=10)
+    args = parser.parse_args()
+
+    text = make_document(args.pages)
+    rng = random.Random(1)
+    questions = [" ".join(rng.sample(WORDS_EN + WORDS_AR, 4)) + "?" for _ in range(args.queries)]
+    print(f"document: {args.pages} pages, {len(text):,} chars")
+
+    start = time.perf_counter()
+    document_hash(text)
+    index = BM25Index.from_text(text)
+    print(f"index build: {time.perf_counter() - start:.2f}s for {len(index.chunks):,} chunks")
+
+    timings = []
+    for q in questions:
+        t0 = time.perf_counter()
+        index.search(q, top_k=5)
+        timings.append(time.perf_counter() - t0)
+    stats = percentiles(timings)
+    print(f"bm25 query:   p50 {stats['p50_ms']:.2f} ms  p95 {stats['p95_ms']:.2f} ms")
+
+    timings = []
+    for q in questions[:args.legacy_queries]:
+        t0 = time.perf_counter()
+        legacy_search(q, text)
+        timings.append(time.perf_counter() - t0)
+    stats = percentiles(timings)
+    print(f"legacy query: p50 {stats['p50_ms']:.2f} ms  p95 {stats['p95_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
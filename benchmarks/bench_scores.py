@@ -0,0 +1,76 @@
+# benchmarks/bench_scores.py
+# Concurrent quiz-score submissions against a local SQLite database.
+#
+#   python benchmarks/bench_scores.py [--users 32] [--submissions 200]
+#
+# Compares the old path (a new engine and connection per save, one INSERT each)
+# with the shared pooled engine and the batched score writer, then times paged reads.
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, insert
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+
+
+def legacy_save(url, username, score, difficulty):
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.execute(insert(db.scores_table), {"username": username, "score": score, "difficulty": difficulty})
+    engine.dispose()
+
+
+def run(n_users, n_submissions, save):
+    def user(i):
+        for _ in range(n_submissions):
+            save(f"user{i}", 1, "Easy")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(n_users) as pool:
+        list(pool.map(user, range(n_users)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=32)
+    parser.add_argument("--submissions", type=int, default=200)
+    args = parser.parse_args()
+    total = args.users * args.submissions
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'scores.db')}"
+        # db reads DATABASE_URL when the engine is first created
+        os.environ["DATABASE_URL"] = url
+        engine = db.get_engine()
+        with engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+
+        seconds = run(args.users, args.submissions, lambda *a: legacy_save(url, *a))
+        print(f"{total} submissions from {args.users} users")
+        print(f"  legacy (engine per save)   {total / seconds:9.0f} saves/s   wall {seconds:.2f}s")
+
+        seconds = run(args.users, args.submissions, lambda *a: db.save_score(*a, wait=True))
+        print(f"  pooled + batched (wait)    {total / seconds:9.0f} saves/s   wall {seconds:.2f}s")
+
+        start = time.perf_counter()
+        run(args.users, args.submissions, db.save_score)
+        db.get_score_writer().flush(timeout=60)
+        seconds = time.perf_counter() - start
+        print(f"  pooled + batched (queued)  {total / seconds:9.0f} saves/s   wall {seconds:.2f}s")
+
+        start = time.perf_counter()
+        pages = sum(1 for _ in db.iter_scores("user0", page_size=50))
+        print(f"  paged read of user0        {pages} pages in {(time.perf_counter() - start) * 1000:.1f} ms")
+        db.get_score_writer().close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
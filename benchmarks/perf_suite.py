@@ -0,0 +1,292 @@
+# benchmarks/perf_suite.py
+# Headless performance regression suite over the app's analysis paths.
+#
+#   python benchmarks/perf_suite.py                              # 10k, 100k, 1M rows; compare with baselines.json
+#   python benchmarks/perf_suite.py --sizes 10M --cases upload_parse analysis_ols
+#   python benchmarks/perf_suite.py --update-baseline            # record the current numbers as the baseline
+#
+# Each case re-creates the core work behind one page on synthetic data
+# (benchmarks/synthetic_data.py) and runs in its own process, so peak memory of one
+# case is not hidden by memory freed from another. Reported time is the median of
+# --repeat runs after a small warm-up run; peak memory is the largest RSS growth. A case regresses when it is
+# slower (or uses more memory) than its baseline by more than the relative
+# threshold *and* the absolute floor, which keeps tiny, noisy timings from failing.
+# The exit status is 1 if anything regressed.
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+import synthetic_data  # noqa: E402
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baselines.json")
+DEFAULT_SIZES = ["10k", "100k", "1M"]
+DEFAULT_THRESHOLDS = {"time": 0.25, "memory": 0.25, "min_seconds": 0.05, "min_mb": 16}
+NUMERIC = ["gdp_growth", "inflation", "unemployment", "interest_rate", "exports_gdp", "imports_gdp",
+           "investment_gdp", "trade_balance", "consumption_growth"]
+ML_FEATURES = ["inflation", "unemployment", "interest_rate", "exports_gdp", "imports_gdp", "investment_gdp",
+               "population_m"]
+
+
+# --------------------
+# Cases: setup(rows, workdir) -> state; run(state) is what gets timed
+# --------------------
+def _csv_file(rows, workdir):
+    path = os.path.join(workdir, f"economic_{rows}.csv")
+    if not os.path.exists(path):
+        synthetic_data.economic_frame(rows).to_csv(path, index=False)
+    return path
+
+
+def setup_frame(rows, workdir):
+    return synthetic_data.economic_frame(rows)
+
+
+def run_upload_parse(path):
+    # pages/1_Upload.py
+    import pandas as pd
+    return pd.read_csv(path)
+
+
+def run_exploration_profile(df):
+    # pages/2_Exploration.py: descriptive statistics and the correlation matrix
+    return df.describe(), df[NUMERIC].corr()
+
+
+def run_analysis_ols(df):
+    # pages/3_Analysis.py
+    import statsmodels.api as sm
+    X = sm.add_constant(df[["inflation", "unemployment", "interest_rate", "investment_gdp"]])
+    model = sm.OLS(df["gdp_growth"], X, missing="drop").fit()
+    return model.summary()
+
+
+def run_prediction_forecast(df):
+    # pages/4_Prediction.py: linear trend forecast of one series
+    import numpy as np
+    from sklearn.linear_model import LinearRegression
+    y = df["gdp_per_capita"].dropna().values.reshape(-1, 1)
+    X = np.arange(len(y)).reshape(-1, 1)
+    model = LinearRegression().fit(X, y)
+    return model.predict(np.arange(len(y), len(y) + 20).reshape(-1, 1))
+
+
+def setup_ml(rows, workdir):
+    from sklearn.model_selection import train_test_split
+    df = synthetic_data.economic_frame(rows)
+    return train_test_split(df[ML_FEATURES], df["gdp_growth"], test_size=0.2, random_state=42)
+
+
+def run_ml_fit(split):
+    # ML page: binned matrix + HistGradientBoosting fit with early stopping
+    import ml_engines
+    X_train, _, y_train, _ = split
+    matrix = ml_engines.prepare_training_matrix(ml_engines.SKLEARN_HIST, "regression", X_train, y_train)
+    return ml_engines.fit_engine(matrix, n_estimators=200)
+
+
+def setup_ml_shap(rows, workdir):
+    import ml_engines
+    X_train, X_test, y_train, y_test = setup_ml(rows, workdir)
+    matrix = ml_engines.prepare_training_matrix(ml_engines.SKLEARN_HIST, "regression", X_train, y_train)
+    model = ml_engines.fit_engine(matrix, n_estimators=200)
+    return model, X_test.sample(min(len(X_test), 2000), random_state=42)
+
+
+def run_ml_shap(state):
+    # ML page: TreeExplainer on at most 2,000 test rows
+    import shap
+    import ml_engines
+    model, X_explain = state
+    return shap.TreeExplainer(ml_engines.explainable_model(model)).shap_values(X_explain)
+
+
+def setup_retrieval(rows, workdir):
+    # One course page per 1,000 rows of the size label (10k -> 10 pages, 1M -> 1,000 pages)
+    from bench_retrieval import make_document
+    return make_document(max(10, rows // 1000))
+
+
+def run_retrieval(text):
+    # pages/simulation.py FAQ bot: build the BM25 index, then answer 100 questions
+    from retrieval import BM25Index
+    index = BM25Index.from_text(text)
+    for i in range(100):
+        index.search(f"price elasticity of demand term{i * 37}", top_k=5)
+    return index
+
+
+def run_csv_digest(path):
+    # pages/simulation.py: statistical digest of an uploaded CSV for the prompt
+    from csv_digest import csv_digest
+    return csv_digest(path, budget_tokens=1000)
+
+
+def setup_panel(rows, workdir):
+    return synthetic_data.world_bank_panel(rows)
+
+
+def run_world_bank_pivot(panel):
+    # pages/analyzis.py: long World Bank rows -> country/year x indicator table
+    pivot = panel.pivot_table(index=["country", "date"], columns="indicator", values="value").reset_index()
+    return pivot
+
+
+def run_world_bank_csv(panel):
+    # pages/analyzis.py: the "Download Full Data as CSV" export
+    buffer = io.StringIO()
+    panel.to_csv(buffer, index=False)
+    return buffer.tell()
+
+
+# name -> (setup, run, max rows or None)
+CASES = {
+    "upload_parse": (_csv_file, run_upload_parse, None),
+    "exploration_profile": (setup_frame, run_exploration_profile, None),
+    "analysis_ols": (setup_frame, run_analysis_ols, None),
+    "prediction_forecast": (setup_frame, run_prediction_forecast, None),
+    "ml_fit": (setup_ml, run_ml_fit, 1_000_000),
+    "ml_shap": (setup_ml_shap, run_ml_shap, 1_000_000),
+    "retrieval": (setup_retrieval, run_retrieval, 1_000_000),
+    "csv_digest": (_csv_file, run_csv_digest, None),
+    "world_bank_pivot": (setup_panel, run_world_bank_pivot, None),
+    "world_bank_csv": (setup_panel, run_world_bank_csv, None),
+}
+
+
+def run_case(name, rows, repeat, workdir):
+    """Runs in the child process; returns median seconds and the largest peak-memory growth."""
+    import ml_engines
+
+    setup, run, _ = CASES[name]
+    # Untimed run on a small input first, so imports and other first-call costs are
+    # not measured, without pre-growing the heap that the real run would fill
+    run(setup(min(rows, 1000), workdir))
+    state = setup(rows, workdir)
+    seconds, peaks = [], []
+    for _ in range(repeat):
+        _, s, peak = ml_engines.measure(run, state)
+        seconds.append(s)
+        peaks.append(peak)
+    return {"seconds": statistics.median(seconds), "peak_mb": max(peaks), "runs": repeat}
+
+
+# --------------------
+# Baselines
+# --------------------
+def machine_info():
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(key, result, baseline, thresholds):
+    """List of regression messages for one result ([] if within thresholds or no baseline)."""
+    base = (baseline or {}).get("results", {}).get(key)
+    if base is None or "error" in result:
+        return []
+    problems = []
+    dt = result["seconds"] - base["seconds"]
+    if dt > thresholds["min_seconds"] and result["seconds"] > base["seconds"] * (1 + thresholds["time"]):
+        problems.append(f"time {base['seconds']:.3f}s -> {result['seconds']:.3f}s (+{dt / base['seconds']:.0%})")
+    dm = result["peak_mb"] - base["peak_mb"]
+    if dm > thresholds["min_mb"] and result["peak_mb"] > max(base["peak_mb"], 0) * (1 + thresholds["memory"]):
+        problems.append(f"memory {base['peak_mb']:.0f}MB -> {result['peak_mb']:.0f}MB")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="*", default=DEFAULT_SIZES, help="row counts, e.g. 10k 100k 1M 10M")
+    parser.add_argument("--cases", nargs="*", choices=sorted(CASES), help="default: all")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="also write this run's results to a JSON file")
+    parser.add_argument("--workdir", help="where generated CSVs are kept (default: a temporary directory)")
+    parser.add_argument("--child", nargs=3, metavar=("CASE", "ROWS", "REPEAT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        name, rows, repeat = args.child[0], int(args.child[1]), int(args.child[2])
+        print(json.dumps(run_case(name, rows, repeat, args.workdir)))
+        return 0
+
+    baseline = None if args.update_baseline else load_baseline(args.baseline)
+    thresholds = {**DEFAULT_THRESHOLDS, **((baseline or {}).get("thresholds") or {})}
+    if baseline and baseline.get("machine") != machine_info():
+        print(f"note: baseline was recorded on {baseline.get('machine')}; timings may not be comparable")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="perf_suite_")
+    results, regressions = {}, []
+    print(f"{'case':<22} {'rows':>6} {'seconds':>9} {'peak MB':>9}  vs baseline")
+    for size in args.sizes:
+        rows = synthetic_data.parse_size(size)
+        for name in args.cases or list(CASES):
+            key = f"{name}@{size}"
+            max_rows = CASES[name][2]
+            if max_rows and rows > max_rows:
+                print(f"{name:<22} {size:>6}  skipped (capped at {max_rows:,} rows)")
+                continue
+            start = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--workdir", workdir,
+                 "--child", name, str(rows), str(args.repeat)],
+                cwd=ROOT, capture_output=True, text=True)
+            if proc.returncode != 0:
+                results[key] = {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+                print(f"{name:<22} {size:>6}  error: {results[key]['error']}")
+                continue
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            result["wall_seconds"] = round(time.perf_counter() - start, 2)
+            results[key] = result
+            problems = compare(key, result, baseline, thresholds)
+            regressions += [f"{key}: {p}" for p in problems]
+            base = (baseline or {}).get("results", {}).get(key)
+            verdict = "REGRESSION " + "; ".join(problems) if problems else (
+                f"{result['seconds'] / base['seconds']:.2f}x time" if base else "no baseline")
+            print(f"{name:<22} {size:>6} {result['seconds']:9.3f} {result['peak_mb']:9.1f}  {verdict}")
+
+    if not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"machine": machine_info(), "thresholds": thresholds, "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.update_baseline:
+        # Keep entries for sizes/cases that were not part of this run
+        merged = load_baseline(args.baseline) or {}
+        report["results"] = {**merged.get("results", {}), **{k: v for k, v in results.items() if "error" not in v}}
+        report["thresholds"] = merged.get("thresholds", thresholds)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"baseline written to {args.baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
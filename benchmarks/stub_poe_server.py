@@ -0,0 +1,140 @@
+# benchmarks/stub_poe_server.py
+# Local stand-in for the POE chat completions API (OpenAI-compatible).
+#
+#   python benchmarks/stub_poe_server.py --port 8765 --token-delay 0.02
+#
+# then point the app at it with POE_API_URL = "http://127.0.0.1:8765/v1/chat/completions"
+# in .streamlit/secrets.toml. Streams server-sent events when the request has
+# "stream": true and returns a single JSON body otherwise.
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_ANSWER = ("Price elasticity of demand measures how strongly the quantity demanded "
+                  "responds to a change in price, holding other factors constant. "
+                  "مرونة الطلب السعرية تقيس استجابة الكمية المطلوبة لتغير السعر.")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    answer = DEFAULT_ANSWER
+    first_token_delay = 0.2
+    token_delay = 0.02
+    # Test knobs (see start()): scripted SSE payloads, failing first requests,
+    # HTTP chunks cut every n bytes, and a connection dropped after n events
+    events = None
+    fail_first = 0
+    fail_status = 503
+    chunk_bytes = None
+    abort_after = None
+    requests_seen = 0
+    _counter_lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_event(self, data):
+        if not self.chunk_bytes:
+            self._send_chunk(data)
+            return
+        # Small chunks split multi-byte characters across reads on the client
+        for i in range(0, len(data), self.chunk_bytes):
+            self._send_chunk(data[i:i + self.chunk_bytes])
+
+    def _stream_payloads(self):
+        if self.events is not None:
+            return [e if isinstance(e, str) else json.dumps(e, ensure_ascii=False) for e in self.events]
+        return [json.dumps({"choices": [{"index": 0, "delta": {"content": ("" if i == 0 else " ") + word}}]},
+                           ensure_ascii=False)
+                for i, word in enumerate(self.answer.split(" "))] + ["[DONE]"]
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        model = body.get("model", "stub")
+        cls = type(self)
+        with cls._counter_lock:
+            cls.requests_seen += 1
+            failing = cls.requests_seen <= self.fail_first
+        time.sleep(self.first_token_delay)
+
+        if failing:
+            payload = json.dumps({"error": {"message": "stub failure"}}).encode()
+            self.send_response(self.fail_status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        if not body.get("stream"):
+            time.sleep(self.token_delay * len(self.answer.split()))
+            payload = json.dumps({
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": self.answer}}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": len(self.answer.split())},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, payload in enumerate(self._stream_payloads()):
+            if self.abort_after is not None and i >= self.abort_after:
+                # Drop the connection without the terminating chunk
+                self.close_connection = True
+                return
+            if i:
+                time.sleep(self.token_delay)
+            self._send_event(f"data: {payload}\n\n".encode())
+        self._send_chunk(b"")
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping idle keep-alive connections is expected here
+        pass
+
+
+def start(port=0, first_token_delay=0.2, token_delay=0.02, **options):
+    """Start the stub in a background thread; returns (server, url).
+
+    `options` override StubHandler attributes: answer, events (SSE payloads as
+    dicts or raw strings, sent instead of the answer), fail_first and
+    fail_status, chunk_bytes, abort_after. server.RequestHandlerClass.requests_seen
+    counts requests.
+    """
+    handler = type("Handler", (StubHandler,), {"first_token_delay": first_token_delay,
+                                               "token_delay": token_delay,
+                                               "_counter_lock": threading.Lock(), **options})
+    server = StubServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-token-delay", type=float, default=0.2)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+    server, url = start(args.port, args.first_token_delay, args.token_delay)
+    print(f"Stub POE API on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
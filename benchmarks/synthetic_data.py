@@ -0,0 +1,90 @@
+# benchmarks/synthetic_data.py
+# Deterministic economic-shaped datasets for the benchmarks.
+#
+# economic_frame(): country-year-quarter macro rows with correlated indicators,
+# a few categorical columns and ~1% missing values.
+# world_bank_panel(): long-format rows shaped like the World Bank API results
+# built by pages/analyzis.py (country, country_code, date, indicator, value).
+import numpy as np
+import pandas as pd
+
+WB_INDICATORS = ["NY.GDP.PCAP.CD", "SP.POP.TOTL", "SE.XPD.TOTL.GD.ZS", "FP.CPI.TOTL.ZG", "SL.UEM.TOTL.ZS",
+                 "NE.EXP.GNFS.ZS", "NE.IMP.GNFS.ZS", "BX.KLT.DINV.WD.GD.ZS", "GC.DOD.TOTL.GD.ZS",
+                 "SP.DYN.LE00.IN", "EG.USE.ELEC.KH.PC", "IT.NET.USER.ZS"]
+N_COUNTRIES = 217
+FIRST_YEAR, LAST_YEAR = 1960, 2023
+SECTORS = ["agriculture", "manufacturing", "construction", "services", "finance", "energy", "mining",
+           "tourism", "transport", "public"]
+REGIONS = ["MENA", "Europe", "East Asia", "South Asia", "Sub-Saharan Africa", "Latin America", "North America"]
+
+
+def parse_size(text):
+    """'10k' -> 10_000, '1M' -> 1_000_000, '2500' -> 2500."""
+    text = str(text).strip()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:].lower(), 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def economic_frame(n_rows, seed=0, missing=0.01):
+    rng = np.random.default_rng(seed)
+    countries = np.array([f"C{i:03d}" for i in range(N_COUNTRIES)])
+    country_idx = rng.integers(0, N_COUNTRIES, n_rows)
+
+    # Two latent factors (business cycle, openness) drive correlated indicators
+    cycle = rng.standard_normal(n_rows)
+    openness = rng.standard_normal(n_rows)
+    level = rng.lognormal(9, 1, N_COUNTRIES)[country_idx]
+
+    df = pd.DataFrame({
+        "country": pd.Categorical.from_codes(country_idx, countries),
+        "region": pd.Categorical.from_codes(country_idx % len(REGIONS), REGIONS),
+        "sector": pd.Categorical.from_codes(rng.integers(0, len(SECTORS), n_rows), SECTORS),
+        "year": rng.integers(FIRST_YEAR, LAST_YEAR + 1, n_rows),
+        "quarter": rng.integers(1, 5, n_rows),
+        "gdp_per_capita": level * np.exp(0.05 * cycle),
+        "gdp_growth": 2.5 + 2.0 * cycle + rng.standard_normal(n_rows),
+        "inflation": 3.0 - 0.8 * cycle + 1.5 * rng.standard_normal(n_rows),
+        "unemployment": np.clip(7.0 - 1.5 * cycle + 2.0 * rng.standard_normal(n_rows), 0.5, None),
+        "interest_rate": np.clip(4.0 + 0.6 * cycle + rng.standard_normal(n_rows), 0.0, None),
+        "exports_gdp": np.clip(30 + 12 * openness + 5 * rng.standard_normal(n_rows), 1, None),
+        "imports_gdp": np.clip(32 + 11 * openness + 5 * rng.standard_normal(n_rows), 1, None),
+        "investment_gdp": 22 + 3 * cycle + 4 * rng.standard_normal(n_rows),
+        "population_m": rng.lognormal(2.5, 1.4, N_COUNTRIES)[country_idx],
+    })
+    df["trade_balance"] = df["exports_gdp"] - df["imports_gdp"]
+    df["consumption_growth"] = 0.7 * df["gdp_growth"] - 0.2 * df["inflation"] + rng.standard_normal(n_rows)
+
+    if missing:
+        for col in ("inflation", "unemployment", "investment_gdp"):
+            df.loc[rng.random(n_rows) < missing, col] = np.nan
+    return df
+
+
+def world_bank_panel(n_rows, seed=0, coverage=0.9):
+    """About n_rows observations: 217 countries x 1960-2023 per indicator, ~10% of cells missing."""
+    rng = np.random.default_rng(seed)
+    years = np.arange(FIRST_YEAR, LAST_YEAR + 1)
+    per_indicator = N_COUNTRIES * len(years)
+    n_indicators = max(1, round(n_rows / (per_indicator * coverage)))
+    indicators = [WB_INDICATORS[i % len(WB_INDICATORS)] + ("" if i < len(WB_INDICATORS) else f".{i}")
+                  for i in range(n_indicators)]
+    n_countries = min(N_COUNTRIES, max(1, int(np.ceil(n_rows / (len(years) * coverage)))))
+
+    country = np.repeat(np.arange(n_countries), len(years))
+    date = np.tile(years, n_countries)
+    names = np.array([f"Country {c}" for c in range(n_countries)], dtype=object)
+    codes = np.array([f"C{c:02d}" for c in range(n_countries)], dtype=object)
+    frames = []
+    for j, indicator in enumerate(indicators):
+        base = rng.lognormal(2 + j % 5, 1, n_countries)[country]
+        trend = np.exp(0.02 * (date - FIRST_YEAR))
+        value = base * trend * np.exp(0.1 * rng.standard_normal(len(date)))
+        keep = rng.random(len(date)) < coverage
+        frames.append(pd.DataFrame({
+            "country": names[country[keep]],
+            "country_code": codes[country[keep]],
+            "date": date[keep],
+            "indicator": indicator,
+            "value": value[keep],
+        }))
+    return pd.concat(frames, ignore_index=True).head(n_rows)
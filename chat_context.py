@@ -0,0 +1,96 @@
+# chat_context.py
+# Token-budgeted chat history and throttled streaming output for the chat pages.
+import math
+import time
+
+MESSAGE_OVERHEAD = 4  # role/formatting tokens per message
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token) without loading a tokenizer."""
+    return math.ceil(len(text) / 4)
+
+
+def message_tokens(message):
+    return estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD
+
+
+def summarize_turns(messages, max_chars=1200):
+    """Extractive one-line-per-turn digest of older messages."""
+    lines = []
+    for m in messages:
+        content = " ".join(m.get("content", "").split())
+        who = "User" if m["role"] == "user" else "Assistant"
+        lines.append(f"- {who}: {content[:160]}{'…' if len(content) > 160 else ''}")
+    summary = "\n".join(lines)
+    if len(summary) > max_chars:
+        summary = "…\n" + summary[-max_chars:].split("\n", 1)[-1]
+    return "Summary of earlier conversation:\n" + summary
+
+
+def _keep_recent(turns, budget):
+    kept, used = [], 0
+    for m in reversed(turns):
+        cost = message_tokens(m)
+        if kept and used + cost > budget:
+            break
+        kept.append(m)
+        used += cost
+    kept.reverse()
+    return kept, used
+
+
+def build_context(history, budget_tokens, summarize=True, summary_share=0.2):
+    """Fit `history` into `budget_tokens`.
+
+    The first system message is always kept, and the newest turns are kept
+    whole while they fit. When older turns must go and `summarize` is set,
+    `summary_share` of the budget is reserved for a condensed note about
+    them. Returns (messages, info), where info has prompt_tokens, kept
+    and dropped counts.
+    """
+    system = [m for m in history if m["role"] == "system"][:1]
+    turns = [m for m in history if m["role"] != "system"]
+    system_tokens = sum(message_tokens(m) for m in system)
+
+    kept, used = _keep_recent(turns, budget_tokens - system_tokens)
+    note = None
+    if summarize and len(kept) < len(turns):
+        reserve = int(budget_tokens * summary_share)
+        kept, used = _keep_recent(turns, budget_tokens - system_tokens - reserve)
+        dropped = turns[:len(turns) - len(kept)]
+        note = {"role": "system",
+                "content": summarize_turns(dropped, max_chars=max(0, (reserve - MESSAGE_OVERHEAD) * 4 - 40))}
+        used += message_tokens(note)
+
+    messages = system + ([note] if note else []) + kept
+    return messages, {"prompt_tokens": system_tokens + used, "kept": len(kept),
+                      "dropped": len(turns) - len(kept)}
+
+
+class ThrottledMarkdown:
+    """Re-renders a Streamlit placeholder at most `fps` times per second.
+
+    Streaming chunk-by-chunk into st.empty().markdown re-sends the whole
+    growing answer each time; throttling bounds the number of re-renders.
+    """
+
+    def __init__(self, placeholder, fps=10):
+        self.placeholder = placeholder
+        self.interval = 1.0 / fps
+        self.text = ""
+        self._last = 0.0
+        self.renders = 0
+
+    def append(self, delta, cursor="▌"):
+        self.text += delta
+        now = time.perf_counter()
+        if now - self._last >= self.interval:
+            self.placeholder.markdown(self.text + cursor)
+            self._last = now
+            self.renders += 1
+
+    def flush(self):
+        self.placeholder.markdown(self.text)
+        self.renders += 1
+        return self.text
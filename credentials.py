@@ -0,0 +1,116 @@
+# credentials.py
+# Login credentials loaded once per process from bcrypt hashes in config.yaml.
+#
+#   python credentials.py add <username> [--name NAME] [--email EMAIL] [--admin]   # prompts for the password
+#
+# Only the user who is logging in is checked with bcrypt, and a successful check
+# is remembered (as a keyed digest, never the password), so a repeat login by
+# the same user skips the bcrypt work.
+import argparse
+import getpass
+import hashlib
+import hmac
+import os
+import threading
+
+import bcrypt
+import yaml
+from yaml.loader import SafeLoader
+
+CONFIG_PATH = "config.yaml"
+
+
+def hash_password(password, rounds=12):
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+
+def _is_bcrypt_hash(value):
+    return isinstance(value, str) and value.startswith(("$2a$", "$2b$", "$2y$"))
+
+
+class CredentialStore:
+    def __init__(self, users):
+        """`users` maps username -> {"password": bcrypt hash, "name": ..., "email": ..., "admin": bool}."""
+        self._users = {}
+        for username, entry in users.items():
+            password = str(entry.get("password", ""))
+            if not _is_bcrypt_hash(password):
+                # Legacy plain-text entry: hash it once for this process; run `credentials.py add` to fix the file
+                password = hash_password(password)
+            self._users[username] = {**entry, "password": password.encode()}
+        self._verified = {}
+        self._lock = threading.Lock()
+        self._cache_key = os.urandom(32)
+        # Unknown usernames still cost one bcrypt check, so response time does not reveal which users exist
+        self._dummy_hash = bcrypt.hashpw(b"", bcrypt.gensalt())
+
+    @classmethod
+    def from_yaml(cls, path=CONFIG_PATH):
+        with open(path, encoding="utf-8") as f:
+            config = yaml.load(f, Loader=SafeLoader) or {}
+        return cls((config.get("credentials") or {}).get("usernames") or {})
+
+    def __len__(self):
+        return len(self._users)
+
+    def __contains__(self, username):
+        return username in self._users
+
+    def name(self, username):
+        entry = self._users.get(username) or {}
+        return entry.get("name") or username
+
+    def is_admin(self, username):
+        entry = self._users.get(username) or {}
+        return entry.get("admin") is True
+
+    def _digest(self, username, password):
+        return hmac.new(self._cache_key, f"{username}\0{password}".encode(), hashlib.sha256).digest()
+
+    def verify(self, username, password):
+        entry = self._users.get(username)
+        if entry is None:
+            bcrypt.checkpw(password.encode(), self._dummy_hash)
+            return False
+        digest = self._digest(username, password)
+        with self._lock:
+            cached = self._verified.get(username)
+        if cached is not None and hmac.compare_digest(cached, digest):
+            return True
+        if not bcrypt.checkpw(password.encode(), entry["password"]):
+            return False
+        with self._lock:
+            self._verified[username] = digest
+        return True
+
+
+def add_user(username, password, name=None, email=None, path=CONFIG_PATH, rounds=12, admin=None):
+    """Add or update a user in config.yaml with a freshly hashed password."""
+    config = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            config = yaml.load(f, Loader=SafeLoader) or {}
+    users = config.setdefault("credentials", {}).setdefault("usernames", {})
+    entry = users.setdefault(username, {})
+    entry.update(name=name or entry.get("name") or username, password=hash_password(password, rounds))
+    if email:
+        entry["email"] = email
+    if admin is not None:
+        entry["admin"] = bool(admin)
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, sort_keys=False, allow_unicode=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="add a user or reset a password")
+    add.add_argument("username")
+    add.add_argument("--name")
+    add.add_argument("--email")
+    add.add_argument("--admin", action=argparse.BooleanOptionalAction, default=None,
+                     help="allow (or with --no-admin, stop) access to the Performance admin page")
+    add.add_argument("--config", default=CONFIG_PATH)
+    args = parser.parse_args()
+    add_user(args.username, getpass.getpass("Password: "), args.name, args.email, args.config, admin=args.admin)
+    print(f"Saved {args.username} to {args.config}")
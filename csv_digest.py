@@ -0,0 +1,241 @@
+# csv_digest.py
+# Compact, token-budgeted description of a CSV file for LLM prompts.
+#
+# One streaming pass over the file collects the schema, per-column summary
+# statistics, pairwise correlations, top categories and a uniform random
+# sample of rows, so large files never have to be rendered as a full table.
+import numpy as np
+import pandas as pd
+
+from chat_context import estimate_tokens
+
+MAX_CORR_COLUMNS = 30
+MAX_TRACKED_CATEGORIES = 10_000
+
+
+class _Accumulator:
+    def __init__(self, reservoir_size, seed):
+        self.rows = 0
+        self.columns = None
+        self.numeric = None
+        self.corr_columns = None
+        self.shift = None
+        self.nulls = None
+        self.n = self.mean = self.m2 = self.min = self.max = None
+        self.pair = None
+        self.categories = {}
+        self.category_overflow = set()
+        # Text columns that started out numeric: values before the switch were not counted
+        self.category_partial = set()
+        self.reservoir = None
+        self.reservoir_keys = None
+        self.reservoir_size = reservoir_size
+        self.rng = np.random.default_rng(seed)
+
+    def _start(self, chunk):
+        self.columns = list(chunk.columns)
+        self.numeric = [c for c in self.columns if pd.api.types.is_numeric_dtype(chunk[c])
+                        and not pd.api.types.is_bool_dtype(chunk[c])]
+        self.nulls = dict.fromkeys(self.columns, 0)
+        k = len(self.numeric)
+        self.n, self.mean, self.m2 = np.zeros(k), np.zeros(k), np.zeros(k)
+        self.min, self.max = np.full(k, np.inf), np.full(k, -np.inf)
+        self.corr_columns = self.numeric[:MAX_CORR_COLUMNS]
+        # Shifting by the first chunk's means keeps the co-moment sums well conditioned
+        self.shift = chunk[self.corr_columns].mean().fillna(0).to_numpy(dtype=float)
+        kc = len(self.corr_columns)
+        self.pair = {name: np.zeros((kc, kc)) for name in ("n", "sx", "sxx", "sxy")}
+        for c in self.columns:
+            if c not in self.numeric:
+                self.categories[c] = pd.Series(dtype="int64")
+
+    def add(self, chunk):
+        if self.columns is None:
+            self._start(chunk)
+        self.rows += len(chunk)
+        for c, n in chunk.isna().sum().items():
+            self.nulls[c] = self.nulls.get(c, 0) + int(n)
+
+        if self.numeric:
+            frame = chunk[self.numeric].apply(pd.to_numeric, errors="coerce")
+            # The kind of each column comes from the first chunk; one that was empty or numeric
+            # there but holds text here is re-classified rather than having its text coerced away
+            to_text = [c for c in self.numeric if not pd.api.types.is_numeric_dtype(chunk[c])
+                       and (frame[c].isna() & chunk[c].notna()).any()]
+            if to_text:
+                self._make_text(to_text)
+            if self.numeric:
+                self._add_moments(frame[self.numeric].to_numpy(dtype=float))
+                self._add_pairs(frame[self.corr_columns].to_numpy(dtype=float) - self.shift)
+
+        for c in self.categories:
+            if c in self.category_overflow:
+                continue
+            counts = self.categories[c].add(chunk[c].astype(str).where(chunk[c].notna()).value_counts(),
+                                            fill_value=0)
+            if len(counts) > MAX_TRACKED_CATEGORIES:
+                # Too many distinct values to count exactly; keep the heavy hitters
+                counts = counts.nlargest(MAX_TRACKED_CATEGORIES // 2)
+                self.category_overflow.add(c)
+            self.categories[c] = counts
+
+        self._sample(chunk)
+
+    def _make_text(self, columns):
+        keep = [i for i, c in enumerate(self.numeric) if c not in columns]
+        for i, c in enumerate(self.numeric):
+            if c in columns:
+                if self.n[i]:
+                    self.category_partial.add(c)
+                self.categories[c] = pd.Series(dtype="int64")
+        self.n, self.mean, self.m2 = self.n[keep], self.mean[keep], self.m2[keep]
+        self.min, self.max = self.min[keep], self.max[keep]
+        self.numeric = [self.numeric[i] for i in keep]
+        keep_corr = [i for i, c in enumerate(self.corr_columns) if c not in columns]
+        self.pair = {name: m[np.ix_(keep_corr, keep_corr)] for name, m in self.pair.items()}
+        self.shift = self.shift[keep_corr]
+        self.corr_columns = [self.corr_columns[i] for i in keep_corr]
+
+    def _add_moments(self, values):
+        present = ~np.isnan(values)
+        n_b = present.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_b = np.where(n_b > 0, np.nansum(values, axis=0) / np.maximum(n_b, 1), 0.0)
+            m2_b = np.nansum((values - mean_b) ** 2, axis=0)
+        # Chan et al. parallel merge of (count, mean, M2)
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        safe_n = np.maximum(n, 1)
+        self.mean = self.mean + delta * n_b / safe_n
+        self.m2 = self.m2 + m2_b + delta ** 2 * self.n * n_b / safe_n
+        self.n = n
+        if values.size:
+            with np.errstate(all="ignore"):
+                self.min = np.fmin(self.min, np.nanmin(np.where(present, values, np.inf), axis=0))
+                self.max = np.fmax(self.max, np.nanmax(np.where(present, values, -np.inf), axis=0))
+
+    def _add_pairs(self, shifted):
+        mask = (~np.isnan(shifted)).astype(float)
+        x = np.nan_to_num(shifted)
+        self.pair["n"] += mask.T @ mask
+        self.pair["sx"] += x.T @ mask            # sum of column i over rows where j is present
+        self.pair["sxx"] += (x * x).T @ mask
+        self.pair["sxy"] += x.T @ x
+
+    def _sample(self, chunk):
+        # Uniform sample without replacement: keep the rows with the smallest random keys
+        keys = self.rng.random(len(chunk))
+        if self.reservoir is None:
+            pool, pool_keys = chunk, keys
+        else:
+            pool = pd.concat([self.reservoir, chunk], ignore_index=True)
+            pool_keys = np.concatenate([self.reservoir_keys, keys])
+        if len(pool) > self.reservoir_size:
+            keep = np.argpartition(pool_keys, self.reservoir_size - 1)[:self.reservoir_size]
+            pool, pool_keys = pool.iloc[keep], pool_keys[keep]
+        self.reservoir = pool.reset_index(drop=True)
+        self.reservoir_keys = pool_keys
+
+    def correlations(self):
+        p = self.pair
+        n, sx, sxx, sxy = p["n"], p["sx"], p["sxx"], p["sxy"]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = n * sxy - sx * sx.T
+            var = (n * sxx - sx ** 2) * (n * sxx.T - sx.T ** 2)
+            corr = cov / np.sqrt(var)
+        cols = self.corr_columns
+        out = []
+        for i in range(len(cols)):
+            for j in range(i + 1, len(cols)):
+                if n[i, j] > 2 and np.isfinite(corr[i, j]):
+                    out.append((cols[i], cols[j], float(corr[i, j])))
+        return sorted(out, key=lambda t: -abs(t[2]))
+
+
+def build_digest(source, chunksize=50_000, reservoir_size=5_000, seed=0, **read_csv_kwargs):
+    """Scan a CSV (path or file object) once and return its digest as a dict."""
+    acc = _Accumulator(reservoir_size, seed)
+    for chunk in pd.read_csv(source, chunksize=chunksize, **read_csv_kwargs):
+        acc.add(chunk)
+    if acc.columns is None:
+        return {"rows": 0, "columns": [], "numeric": {}, "categorical": {}, "correlations": [],
+                "sample": pd.DataFrame()}
+
+    sample = acc.reservoir if acc.reservoir is not None else pd.DataFrame(columns=acc.columns)
+    numeric = {}
+    for i, c in enumerate(acc.numeric):
+        col = pd.to_numeric(sample[c], errors="coerce").dropna()
+        quantiles = col.quantile([0.25, 0.5, 0.75]).tolist() if len(col) else [None] * 3
+        n = acc.n[i]
+        numeric[c] = {
+            "dtype": str(sample[c].dtype),
+            "missing": acc.nulls[c],
+            "mean": acc.mean[i] if n else None,
+            "std": float(np.sqrt(acc.m2[i] / (n - 1))) if n > 1 else None,
+            "min": acc.min[i] if n else None,
+            "p25": quantiles[0], "median": quantiles[1], "p75": quantiles[2],
+            "max": acc.max[i] if n else None,
+        }
+    categorical = {}
+    for c, counts in acc.categories.items():
+        categorical[c] = {
+            "missing": acc.nulls[c],
+            "distinct": len(counts),
+            "distinct_is_lower_bound": c in acc.category_overflow or c in acc.category_partial,
+            "top": [(str(v), int(k)) for v, k in counts.nlargest(10).items()],
+        }
+    return {"rows": acc.rows, "columns": acc.columns, "numeric": numeric, "categorical": categorical,
+            "correlations": acc.correlations(), "sample": sample}
+
+
+def _fmt(x):
+    if x is None or (isinstance(x, float) and not np.isfinite(x)):
+        return "n/a"
+    return f"{x:.4g}"
+
+
+def render_digest(digest, budget_tokens=1000, sample_rows=10, top_categories=5, top_correlations=10):
+    """Render the digest as text, shrinking detail until it fits `budget_tokens`."""
+    levels = [(sample_rows, top_categories, top_correlations, None)]
+    levels += [(max(sample_rows // 2, 3), 3, 5, None), (2, 2, 3, None), (0, 1, 0, None), (0, 0, 0, 40)]
+    text = ""
+    for n_rows, n_cats, n_corr, max_cols in levels:
+        text = _render(digest, n_rows, n_cats, n_corr, max_cols)
+        if estimate_tokens(text) <= budget_tokens:
+            return text
+    return text[:budget_tokens * 4]
+
+
+def _render(d, n_rows, n_cats, n_corr, max_cols):
+    rows = d["rows"]
+    lines = [f"Dataset: {rows:,} rows x {len(d['columns'])} columns", "Columns:"]
+    columns = d["columns"] if max_cols is None else d["columns"][:max_cols]
+    for c in columns:
+        if c in d["numeric"]:
+            s = d["numeric"][c]
+            lines.append(
+                f"- {c} ({s['dtype']}): missing {s['missing'] / max(rows, 1):.1%}, mean {_fmt(s['mean'])}, "
+                f"std {_fmt(s['std'])}, min {_fmt(s['min'])}, p25 {_fmt(s['p25'])}, "
+                f"median {_fmt(s['median'])}, p75 {_fmt(s['p75'])}, max {_fmt(s['max'])}"
+            )
+        else:
+            s = d["categorical"][c]
+            distinct = f"{'>=' if s['distinct_is_lower_bound'] else ''}{s['distinct']:,}"
+            line = f"- {c} (text): missing {s['missing'] / max(rows, 1):.1%}, distinct {distinct}"
+            if n_cats and s["top"]:
+                line += "; top " + ", ".join(f"{v} ({k / max(rows, 1):.0%})" for v, k in s["top"][:n_cats])
+            lines.append(line)
+    if max_cols is not None and len(d["columns"]) > max_cols:
+        lines.append(f"- ... {len(d['columns']) - max_cols} more columns")
+    if n_corr and d["correlations"]:
+        lines.append("Strongest correlations:")
+        lines += [f"- {a} ~ {b}: {r:+.2f}" for a, b, r in d["correlations"][:n_corr]]
+    if n_rows and len(d["sample"]):
+        shown = d["sample"].head(n_rows)
+        lines.append(f"Random sample of {len(shown)} rows:")
+        lines.append(shown.to_csv(index=False, float_format="%.4g").strip())
+    return "\n".join(lines)
+
+
+def csv_digest(source, budget_tokens=1000, **kwargs):
+    return render_digest(build_digest(source, **kwargs), budget_tokens=budget_tokens)
@@ -1,22 +1,122 @@
 # db.py
-from sqlalchemy import create_engine
+import os
+import threading
+
 import pandas as pd
+from sqlalchemy import (
+    Column, DateTime, Index, Integer, MetaData, String, Table, create_engine, func, insert, select,
+)
 
-def get_connection():
-    # Replace these values with your real database credentials
+from batch_writer import BatchWriter
+
+metadata = MetaData()
+scores_table = Table(
+    "scores", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("username", String(150), nullable=False),
+    Column("score", Integer, nullable=False),
+    Column("difficulty", String(20)),
+    Column("created_at", DateTime, server_default=func.now()),
+)
+# Created separately: create_all skips the indexes of a table that already exists
+scores_username_id_index = Index("idx_scores_username_id", scores_table.c.username, scores_table.c.id)
+
+_engine = None
+_engine_lock = threading.Lock()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_database_url():
+    # Replace these values with your real database credentials, or set DATABASE_URL
+    # (e.g. sqlite:///scores.db for local testing)
     user = "postgres"
     password = "ZZMM2026"
     host = "localhost"
     port = "5432"
     database = "postgres"
-    url = f"postgresql://{user}:{password}@{host}:{port}/{database}"
-    return engine = create_engine(url)
-    
-def save_score(username, score, difficulty):
-    engine = get_connection()
-    with engine.begin() as connection:
-        connection.execute(
-            "INSERT INTO scores (username, score, difficulty) VALUES (%s, %s, %s)",
-            (username, score, difficulty)
-        )
+    return os.environ.get("DATABASE_URL", f"postgresql://{user}:{password}@{host}:{port}/{database}")
+
+
+def get_engine():
+    """Process-wide engine; its connection pool is shared by every session."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            url = get_database_url()
+            options = {"pool_pre_ping": True}
+            if not url.startswith("sqlite"):
+                options.update(pool_size=5, max_overflow=10, pool_recycle=1800)
+            _engine = create_engine(url, **options)
+            metadata.create_all(_engine)
+            scores_username_id_index.create(_engine, checkfirst=True)
+        return _engine
+
+
+def get_connection():
+    return get_engine()
+
+
+class ScoreWriter:
+    """Buffers quiz scores and inserts them in batches from one background thread."""
+
+    def __init__(self, engine, batch_size=200, flush_interval=0.5, max_attempts=3, retry_delay=0.5):
+        self.engine = engine
+        self._writer = BatchWriter(self._insert, name="score-writer", batch_size=batch_size,
+                                   flush_interval=flush_interval, max_attempts=max_attempts,
+                                   retry_delay=retry_delay)
+
+    def submit(self, username, score, difficulty):
+        self._writer.submit({"username": username, "score": score, "difficulty": difficulty})
+
+    def _insert(self, rows):
+        # One transaction and one executemany per batch
+        with self.engine.begin() as connection:
+            connection.execute(insert(scores_table), rows)
+
+    def flush(self, timeout=10):
+        """Block until every score submitted so far is written; False on timeout or dropped scores."""
+        return self._writer.flush(timeout)
+
+    def close(self):
+        self._writer.close()
+
+
+def get_score_writer():
+    global _writer
+    engine = get_engine()
+    with _writer_lock:
+        if _writer is None:
+            _writer = ScoreWriter(engine)
+        return _writer
+
+
+def save_score(username, score, difficulty, wait=False):
+    """Queue a score; pass wait=True to block until it is committed (returns False if it was not)."""
+    writer = get_score_writer()
+    writer.submit(username, score, difficulty)
+    if wait:
+        return writer.flush()
+    return True
+
+
+def load_scores(username=None, limit=50, before_id=None):
+    """Newest scores first, `limit` at a time; pass the smallest id seen as before_id for the next page."""
+    query = select(scores_table).order_by(scores_table.c.id.desc()).limit(limit)
+    if username is not None:
+        query = query.where(scores_table.c.username == username)
+    if before_id is not None:
+        query = query.where(scores_table.c.id < before_id)
+    with get_engine().connect() as connection:
+        return pd.read_sql(query, connection)
+
 
+def iter_scores(username=None, page_size=1000):
+    """All scores, newest first, fetched one page at a time."""
+    before_id = None
+    while True:
+        page = load_scores(username, limit=page_size, before_id=before_id)
+        if page.empty:
+            return
+        yield page
+        before_id = int(page["id"].min())
@@ -0,0 +1,185 @@
+# embeddings.py
+# Local CPU embedding index for semantic FAQ retrieval.
+#
+# Runs fully offline: the model is loaded from a local directory
+# (EMBEDDING_MODEL=/path/to/model) or from the Hugging Face cache, never
+# downloaded at request time. Prime the cache once with:
+#   python embeddings.py download
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+
+import numpy as np
+
+from lazy_imports import is_available, lazy
+
+# torch/transformers are only imported once an Embedder is actually built
+if is_available("torch") and is_available("transformers"):
+    torch, transformers = lazy("torch"), lazy("transformers")
+else:
+    torch = transformers = None
+
+DEFAULT_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+MODEL_NAME = os.environ.get("EMBEDDING_MODEL", DEFAULT_MODEL)
+INDEX_DIR = os.environ.get("EMBEDDING_INDEX_DIR", "index_cache")
+IVF_MIN_CHUNKS = 20_000
+
+
+class EmbeddingUnavailable(RuntimeError):
+    pass
+
+
+class Embedder:
+    """Multilingual sentence encoder (mean-pooled, L2-normalised) on CPU."""
+
+    def __init__(self, model_name=MODEL_NAME, threads=None):
+        if torch is None:
+            raise EmbeddingUnavailable("Semantic search needs `torch` and `transformers`.")
+        try:
+            self.tokenizer = transformers.AutoTokenizer.from_pretrained(model_name, local_files_only=True)
+            self.model = transformers.AutoModel.from_pretrained(model_name, local_files_only=True).eval()
+        except OSError as e:
+            raise EmbeddingUnavailable(
+                f"Embedding model '{model_name}' is not available locally; "
+                "run `python embeddings.py download` once or set EMBEDDING_MODEL."
+            ) from e
+        if threads:
+            torch.set_num_threads(threads)
+        self.model_name = model_name
+
+    def encode(self, texts, batch_size=32, max_length=256):
+        out = []
+        with torch.inference_mode():
+            for i in range(0, len(texts), batch_size):
+                batch = self.tokenizer(texts[i:i + batch_size], padding=True, truncation=True,
+                                       max_length=max_length, return_tensors="pt")
+                hidden = self.model(**batch).last_hidden_state
+                mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+                out.append(torch.nn.functional.normalize(pooled, dim=1).numpy().astype(np.float32))
+        if not out:
+            return np.zeros((0, self.model.config.hidden_size), dtype=np.float32)
+        return np.vstack(out)
+
+
+def _kmeans(vectors, n_lists, iterations=10, seed=0):
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), min(len(vectors), n_lists * 64), replace=False)]
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        for k in range(n_lists):
+            members = sample[assign == k]
+            if len(members):
+                c = members.mean(axis=0)
+                centroids[k] = c / (np.linalg.norm(c) or 1.0)
+    return centroids.astype(np.float32)
+
+
+class VectorIndex:
+    """Chunk vectors persisted as .npy and memory-mapped on load.
+
+    Search is exact (brute-force inner product) for small documents and an
+    inverted-file (IVF) probe over k-means lists once there are more than
+    IVF_MIN_CHUNKS chunks.
+    """
+
+    def __init__(self, directory, vectors, chunks, centroids=None, assignments=None):
+        self.directory = directory
+        self.vectors = vectors
+        self.chunks = chunks
+        self.centroids = centroids
+        self.assignments = assignments
+        self._lists = None
+        if centroids is not None:
+            order = np.argsort(assignments, kind="stable")
+            bounds = np.searchsorted(assignments[order], np.arange(len(centroids) + 1))
+            self._lists = [order[bounds[k]:bounds[k + 1]] for k in range(len(centroids))]
+
+    @staticmethod
+    def path_for(doc_hash, model_name=MODEL_NAME, root=INDEX_DIR):
+        return os.path.join(root, model_name.replace("/", "__"), doc_hash)
+
+    @classmethod
+    def exists(cls, directory):
+        return os.path.exists(os.path.join(directory, "vectors.npy"))
+
+    @classmethod
+    def build(cls, directory, chunks, embedder, batch_size=32, progress=None):
+        """Embed chunks in batches, persist them, and return (index, stats)."""
+        start = time.perf_counter()
+        parts = []
+        for i in range(0, len(chunks), batch_size * 8):
+            parts.append(embedder.encode(chunks[i:i + batch_size * 8], batch_size=batch_size))
+            if progress:
+                progress(min(i + batch_size * 8, len(chunks)), len(chunks))
+        vectors = np.vstack(parts) if parts else np.zeros((0, 1), dtype=np.float32)
+        seconds = time.perf_counter() - start
+
+        # Write into a scratch directory and rename, so other sessions never see a partial index
+        scratch = f"{directory}.tmp-{os.getpid()}-{uuid.uuid4().hex}"
+        os.makedirs(scratch, exist_ok=True)
+        np.save(os.path.join(scratch, "vectors.npy"), vectors)
+        with open(os.path.join(scratch, "chunks.json"), "w", encoding="utf-8") as f:
+            json.dump(chunks, f, ensure_ascii=False)
+        if len(vectors) > IVF_MIN_CHUNKS:
+            centroids = _kmeans(vectors, n_lists=int(np.sqrt(len(vectors))))
+            assignments = np.argmax(vectors @ centroids.T, axis=1).astype(np.int32)
+            np.save(os.path.join(scratch, "centroids.npy"), centroids)
+            np.save(os.path.join(scratch, "assignments.npy"), assignments)
+        os.makedirs(os.path.dirname(directory) or ".", exist_ok=True)
+        try:
+            os.replace(scratch, directory)
+        except OSError:
+            # Another session finished the same index first; keep theirs
+            shutil.rmtree(scratch, ignore_errors=True)
+            if not cls.exists(directory):
+                raise
+        stats = {"chunks": len(chunks), "seconds": seconds,
+                 "chunks_per_second": len(chunks) / seconds if seconds else 0.0}
+        return cls.load(directory), stats
+
+    @classmethod
+    def load(cls, directory):
+        vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        with open(os.path.join(directory, "chunks.json"), encoding="utf-8") as f:
+            chunks = json.load(f)
+        centroids = assignments = None
+        if os.path.exists(os.path.join(directory, "centroids.npy")):
+            centroids = np.load(os.path.join(directory, "centroids.npy"))
+            assignments = np.load(os.path.join(directory, "assignments.npy"), mmap_mode="r")
+        return cls(directory, vectors, chunks, centroids, assignments)
+
+    def search_vector(self, query, top_k=5, n_probe=8):
+        """Return up to top_k (score, chunk) pairs for a normalised query vector."""
+        if len(self.chunks) == 0:
+            return []
+        if self._lists is None:
+            candidates = None
+            scores = self.vectors @ query
+        else:
+            probe = np.argsort(self.centroids @ query)[::-1][:n_probe]
+            candidates = np.sort(np.concatenate([self._lists[k] for k in probe]))
+            scores = self.vectors[candidates] @ query
+        if len(scores) == 0:
+            return []
+        k = min(top_k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        ids = best if candidates is None else candidates[best]
+        return [(float(scores[b]), self.chunks[i]) for b, i in zip(best, ids)]
+
+    def search(self, question, embedder, top_k=5):
+        return self.search_vector(embedder.encode([question])[0], top_k=top_k)
+
+
+if __name__ == "__main__" and sys.argv[1:2] == ["download"]:
+    # One-time, online: fetch the model into the local Hugging Face cache.
+    if transformers is None:
+        sys.exit("Install `torch` and `transformers` first.")
+    transformers.AutoTokenizer.from_pretrained(MODEL_NAME)
+    transformers.AutoModel.from_pretrained(MODEL_NAME)
+    print(f"Cached {MODEL_NAME}")
@@ -0,0 +1,164 @@
+# experiments.py
+# Experiment tracking store for the Machine Learning page (SQLite, WAL mode).
+import atexit
+import json
+import queue
+import sqlite3
+import time
+
+import pandas as pd
+
+from batch_writer import BatchWriter
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS experiment_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    target TEXT NOT NULL,
+    features TEXT NOT NULL,
+    problem_type TEXT,
+    engine TEXT,
+    metric_name TEXT,
+    metric_value REAL,
+    fit_seconds REAL,
+    dataset_hash TEXT,
+    params TEXT,
+    metrics TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_target ON experiment_runs (target, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_target_id ON experiment_runs (target, id);
+CREATE INDEX IF NOT EXISTS idx_runs_features ON experiment_runs (features);
+CREATE INDEX IF NOT EXISTS idx_runs_created_at ON experiment_runs (created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_dataset ON experiment_runs (dataset_hash);
+"""
+
+COLUMNS = ["created_at", "target", "features", "problem_type", "engine", "metric_name",
+           "metric_value", "fit_seconds", "dataset_hash", "params", "metrics"]
+INSERT = f"INSERT INTO experiment_runs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class ExperimentStore:
+    """Process-wide run store.
+
+    Writes are queued and committed in batches by one background thread, so
+    logging a run never blocks a Streamlit rerun. Reads go through a small pool
+    of connections; WAL mode lets them proceed while the writer commits.
+    """
+
+    def __init__(self, path="ml_models.db", batch_size=200, flush_interval=0.5, pool_size=4):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pool = queue.Queue()
+
+        conn = _connect(path)
+        conn.executescript(SCHEMA)
+        conn.commit()
+        self._pool.put(conn)
+        for _ in range(pool_size - 1):
+            self._pool.put(_connect(path))
+
+        # The writer thread opens its own connection on first use and closes it on close()
+        self._writer_conn = None
+        self._writer = BatchWriter(self._write_batch, name="experiment-writer", batch_size=batch_size,
+                                   flush_interval=flush_interval, on_close=self._close_writer_conn)
+        atexit.register(self.close)
+
+    # --------------------
+    # Writes
+    # --------------------
+    def log_run(self, target, features, problem_type, engine, metric_name, metric_value,
+                fit_seconds=None, dataset_hash=None, params=None, metrics=None):
+        """Queue one run for writing; returns immediately."""
+        features = ",".join(features) if isinstance(features, (list, tuple)) else features
+        self._writer.submit((
+            time.time(), target, features, problem_type, engine, metric_name,
+            None if metric_value is None else float(metric_value),
+            None if fit_seconds is None else float(fit_seconds),
+            dataset_hash,
+            json.dumps(params or {}, default=str),
+            json.dumps(metrics or {}, default=str),
+        ))
+
+    def _write_batch(self, batch):
+        if self._writer_conn is None:
+            self._writer_conn = _connect(self.path)
+        with self._writer_conn:
+            self._writer_conn.executemany(INSERT, batch)
+
+    def _close_writer_conn(self):
+        if self._writer_conn is not None:
+            self._writer_conn.close()
+
+    def flush(self, timeout=10):
+        """Block until every run queued so far is committed; False on timeout or dropped runs."""
+        return self._writer.flush(timeout)
+
+    def close(self):
+        self._writer.close()
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    # --------------------
+    # Reads
+    # --------------------
+    def _read(self, sql, params=()):
+        conn = self._pool.get()
+        try:
+            return pd.read_sql_query(sql, conn, params=params)
+        finally:
+            self._pool.put(conn)
+
+    def targets(self):
+        return self._read("SELECT DISTINCT target FROM experiment_runs ORDER BY target")["target"].tolist()
+
+    def query_runs(self, target=None, features=None, engine=None, since=None, before_id=None, limit=50):
+        """Most recent runs first, filtered and paged by id (keyset pagination)."""
+        clauses, params = [], []
+        for column, value in (("target", target), ("features", features), ("engine", engine)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(",".join(value) if isinstance(value, (list, tuple)) else value)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        runs = self._read(
+            f"SELECT * FROM experiment_runs {where} ORDER BY id DESC LIMIT ?", (*params, limit)
+        )
+        runs["created_at"] = pd.to_datetime(runs["created_at"], unit="s")
+        return runs
+
+    def compare(self, target, problem_type=None):
+        """Per engine and feature set: run count, mean/best metric and mean fit time."""
+        where, params = "WHERE target = ?", [target]
+        if problem_type is not None:
+            where += " AND problem_type = ?"
+            params.append(problem_type)
+        summary = self._read(
+            f"""
+            SELECT engine, features, problem_type, metric_name,
+                   COUNT(*) AS runs,
+                   AVG(metric_value) AS mean_metric,
+                   MIN(metric_value) AS min_metric,
+                   MAX(metric_value) AS max_metric,
+                   AVG(fit_seconds) AS mean_fit_seconds,
+                   MAX(created_at) AS last_run
+            FROM experiment_runs {where}
+            GROUP BY engine, features, problem_type, metric_name
+            ORDER BY runs DESC
+            """,
+            params,
+        )
+        summary["last_run"] = pd.to_datetime(summary["last_run"], unit="s")
+        return summary
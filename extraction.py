@@ -0,0 +1,176 @@
+# extraction.py
+# Text extraction for uploaded PDF/DOCX/TXT files, cached by file hash.
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from lazy_imports import is_available, lazy
+
+PyPDF2 = lazy("PyPDF2") if is_available("PyPDF2") else None
+docx = lazy("docx") if is_available("docx") else None
+
+CACHE_DIR = os.environ.get("EXTRACT_CACHE_DIR", "extract_cache")
+PAGES_PER_TASK = 16
+MIN_PAGES_FOR_WORKERS = 48
+# Documents kept in memory; older ones are dropped and re-read from CACHE_DIR when needed
+MEMORY_CACHE_DOCUMENTS = int(os.environ.get("EXTRACT_MEMORY_DOCUMENTS", "32"))
+
+# file hash -> {"page_count": n, "pages": {page number: text}}, least recently used first;
+# shared by all sessions in the process
+_memory = OrderedDict()
+_lock = threading.Lock()
+
+# Parsed once per worker process by _init_worker
+_reader = None
+
+
+def file_hash(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def count_pages(data, cache_dir=CACHE_DIR):
+    """Number of pages in a PDF, remembered alongside its cached text."""
+    digest = file_hash(data)
+    entry = _cache_entry(digest, cache_dir)
+    if entry["page_count"] is None:
+        entry["page_count"] = len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+        _store_pages(digest, entry, {}, cache_dir)
+    return entry["page_count"]
+
+
+# --------------------
+# Page cache
+# --------------------
+def _cache_path(digest, cache_dir):
+    return os.path.join(cache_dir, f"{digest}.json")
+
+
+def _cache_entry(digest, cache_dir):
+    with _lock:
+        if digest in _memory:
+            _memory.move_to_end(digest)
+            return _memory[digest]
+    entry = {"page_count": None, "pages": {}}
+    path = _cache_path(digest, cache_dir)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            stored = json.load(f)
+        entry = {"page_count": stored["page_count"],
+                 "pages": {int(k): v for k, v in stored["pages"].items()}}
+    with _lock:
+        entry = _memory.setdefault(digest, entry)
+        while len(_memory) > MEMORY_CACHE_DOCUMENTS:
+            _memory.popitem(last=False)
+        return entry
+
+
+def _store_pages(digest, entry, new_pages, cache_dir):
+    with _lock:
+        entry["pages"].update(new_pages)
+        snapshot = {"page_count": entry["page_count"], "pages": dict(entry["pages"])}
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{_cache_path(digest, cache_dir)}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    os.replace(tmp, _cache_path(digest, cache_dir))
+
+
+# --------------------
+# PDF
+# --------------------
+def _init_worker(data):
+    global _reader
+    _reader = PyPDF2.PdfReader(io.BytesIO(data))
+
+
+def _extract_range(start, end):
+    return {i: _reader.pages[i].extract_text() or "" for i in range(start, end)}
+
+
+def extract_pdf_pages(data, page_range=None, workers=None, progress=None, cache_dir=CACHE_DIR):
+    """Return ({page index: text}, stats) for the pages in `page_range` (0-based, end exclusive).
+
+    Only pages missing from the cache are extracted, in parallel worker
+    processes for large documents. `progress(done, total)` is called as pages
+    finish. stats has pages, extracted (cache misses), seconds and seconds_per_page.
+    """
+    digest = file_hash(data)
+    entry = _cache_entry(digest, cache_dir)
+    pages = entry["pages"]
+    if page_range is None:
+        page_range = range(count_pages(data, cache_dir))
+    wanted = list(page_range)
+    missing = [i for i in wanted if i not in pages]
+
+    start_time = time.perf_counter()
+    if missing:
+        tasks = _page_runs(missing)
+        workers = workers or os.cpu_count() or 1
+        extracted = {}
+        if workers == 1 or len(missing) < MIN_PAGES_FOR_WORKERS:
+            _init_worker(data)
+            for s, e in tasks:
+                extracted.update(_extract_range(s, e))
+                if progress:
+                    progress(len(extracted), len(missing))
+        else:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=_init_worker, initargs=(data,)) as pool:
+                futures = [pool.submit(_extract_range, s, e) for s, e in tasks]
+                for future in as_completed(futures):
+                    extracted.update(future.result())
+                    if progress:
+                        progress(len(extracted), len(missing))
+        _store_pages(digest, entry, extracted, cache_dir)
+    seconds = time.perf_counter() - start_time
+
+    stats = {
+        "pages": len(wanted),
+        "extracted": len(missing),
+        "seconds": seconds,
+        "seconds_per_page": seconds / len(missing) if missing else 0.0,
+    }
+    return {i: pages[i] for i in wanted}, stats
+
+
+def _page_runs(missing):
+    """Group sorted page numbers into contiguous [start, end) runs of at most PAGES_PER_TASK."""
+    runs = []
+    for i in missing:
+        if runs and runs[-1][1] == i and runs[-1][1] - runs[-1][0] < PAGES_PER_TASK:
+            runs[-1][1] = i + 1
+        else:
+            runs.append([i, i + 1])
+    return runs
+
+
+# --------------------
+# DOCX / TXT
+# --------------------
+def extract_docx(data, cache_dir=CACHE_DIR):
+    digest = file_hash(data)
+    entry = _cache_entry(digest, cache_dir)
+    if 0 not in entry["pages"]:
+        doc = docx.Document(io.BytesIO(data))
+        _store_pages(digest, entry, {0: "\n".join(p.text for p in doc.paragraphs)}, cache_dir)
+    return entry["pages"][0]
+
+
+def extract_text(filename, data, page_range=None, workers=None, progress=None, cache_dir=CACHE_DIR):
+    """Extract text from an uploaded file; returns (text, stats or None)."""
+    ext = filename.rsplit(".", 1)[-1].lower()
+    if ext == "pdf" and PyPDF2:
+        pages, stats = extract_pdf_pages(data, page_range, workers, progress, cache_dir)
+        return "\n\n".join(pages[i] for i in sorted(pages)), stats
+    if ext == "docx" and docx:
+        return extract_docx(data, cache_dir), None
+    if ext == "txt":
+        return data.decode("utf-8", errors="ignore"), None
+    return "", None
@@ -0,0 +1,328 @@
+# instrumentation.py
+# Timing spans, per-rerun totals, memory deltas and optional cProfile sampling.
+#
+#   with instrumentation.rerun("Analysis"):           # around the page body
+#       with instrumentation.span("ols", "fit"):      # around a hot path
+#           model = sm.OLS(y, X).fit()
+#
+# A rerun is closed however the page exits: normally ("ok"), through st.rerun()
+# ("rerun"), st.stop() ("stopped") or an uncaught exception ("error"). A run left
+# open some other way is closed as "interrupted" at the session's next rerun,
+# ending at its last span, and is reported apart from the other runs.
+#
+# Off by default. Enable with DATASTAT_INSTRUMENT=1 (and DATASTAT_PROFILE_RATE=0.1
+# to profile one rerun in ten) or from the Performance admin page. When disabled,
+# span() returns a shared no-op context manager, so leaving spans in hot paths is
+# nearly free. Finished reruns go to an in-memory ring buffer for the admin page
+# and, one JSON object per line, to DATASTAT_PERF_LOG (perf_log.jsonl).
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+
+CATEGORIES = ("fetch", "parse", "fit", "explain", "render", "llm", "retrieve", "db", "auth")
+
+_enabled = os.environ.get("DATASTAT_INSTRUMENT", "0") == "1"
+_profile_rate = float(os.environ.get("DATASTAT_PROFILE_RATE", "0"))
+_log_path = os.environ.get("DATASTAT_PERF_LOG", "perf_log.jsonl")
+
+_NOOP = contextlib.nullcontext()
+_active = {}   # session id (or thread id outside Streamlit) -> _Rerun
+_recent = deque(maxlen=200)
+_totals = {}   # span name -> (count, seconds, max seconds)
+MAX_SPANS_PER_RERUN = 500
+_lock = threading.Lock()
+_profiler_lock = threading.Lock()   # one cProfile at a time per process
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 2 ** 20
+    except OSError:
+        return None
+
+
+def _session_key():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except ImportError:
+        ctx = None
+    # Streamlit may run successive reruns of one session on different threads
+    return ctx.session_id if ctx is not None else threading.get_ident()
+
+
+def _delta(before, after):
+    return None if before is None or after is None else round(after - before, 2)
+
+
+def configure(enabled=None, profile_rate=None, log_path=None):
+    """Change the process-wide settings; None leaves a setting as it is."""
+    global _enabled, _profile_rate, _log_path
+    if enabled is not None:
+        _enabled = bool(enabled)
+    if profile_rate is not None:
+        _profile_rate = min(max(float(profile_rate), 0.0), 1.0)
+    if log_path is not None:
+        _log_path = log_path
+
+
+def settings():
+    return {"enabled": _enabled, "profile_rate": _profile_rate, "log_path": _log_path}
+
+
+def is_enabled():
+    return _enabled
+
+
+# --------------------
+# Reruns
+# --------------------
+class _Rerun:
+    def __init__(self, page):
+        self.page = page
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.last_end = self.start   # end of the latest span; an interrupted run ends here
+        self.rss = _rss_mb()
+        self.spans = []
+        self.dropped_spans = 0
+        self.stack = []
+        self.profiler = None
+        if _profile_rate and random.random() < _profile_rate and _profiler_lock.acquire(blocking=False):
+            self.profiler = cProfile.Profile()
+            try:
+                self.profiler.enable()
+            except ValueError:   # another profiler is already active in this process
+                self.profiler = None
+                _profiler_lock.release()
+
+    def finish(self, status):
+        interrupted = status == "interrupted"
+        # An interrupted run is closed at the next rerun; stop its clock at its last span, not there
+        seconds = (self.last_end if interrupted else time.perf_counter()) - self.start
+        totals = {}
+        for s in self.spans:
+            totals[s["category"]] = totals.get(s["category"], 0.0) + s["self_seconds"]
+        record = {
+            "ts": self.started,
+            "page": self.page,
+            "status": status,
+            "seconds": round(seconds, 4),
+            "rss_delta_mb": None if interrupted else _delta(self.rss, _rss_mb()),
+            "totals": {k: round(v, 4) for k, v in totals.items()},
+            "untracked_seconds": round(max(seconds - sum(totals.values()), 0.0), 4),
+            "spans": self.spans,
+            "dropped_spans": self.dropped_spans,
+        }
+        if self.profiler is not None:
+            self.profiler.disable()
+            _profiler_lock.release()
+            record["profile"] = _top_functions(self.profiler)
+        return record
+
+
+def _top_functions(profiler, limit=25):
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, func), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({"function": f"{func} ({os.path.basename(filename)}:{line})", "calls": calls,
+                     "self_seconds": round(tottime, 4), "cumulative_seconds": round(cumtime, 4)})
+    rows.sort(key=lambda r: -r["cumulative_seconds"])
+    return rows[:limit]
+
+
+def _write(record):
+    with _lock:
+        _recent.append(record)
+        if _log_path:
+            with open(_log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+
+def start_rerun(page):
+    """Begin timing a page run; an unfinished previous run of the session is logged as interrupted."""
+    key = _session_key()
+    previous = _active.pop(key, None)
+    if previous is not None:
+        _write(previous.finish("interrupted"))
+    if _enabled:
+        _active[key] = _Rerun(page)
+
+
+def end_rerun(status="ok"):
+    if not _active:
+        return
+    rerun = _active.pop(_session_key(), None)
+    if rerun is not None:
+        _write(rerun.finish(status))
+
+
+def _exit_status(exc):
+    try:
+        from streamlit.runtime.scriptrunner import RerunException, StopException
+    except ImportError:
+        return "error"
+    if isinstance(exc, RerunException):
+        return "rerun"
+    if isinstance(exc, StopException):
+        return "stopped"
+    return "error"
+
+
+@contextlib.contextmanager
+def rerun(page):
+    """Time the page body run inside the block, closing the rerun however the body exits."""
+    start_rerun(page)
+    status = "error"
+    try:
+        yield
+        status = "ok"
+    except BaseException as e:
+        status = _exit_status(e)
+        raise
+    finally:
+        end_rerun(status)
+
+
+# --------------------
+# Spans
+# --------------------
+class _Span:
+    __slots__ = ("name", "category", "rerun", "start", "rss", "child_seconds")
+
+    def __init__(self, name, category, rerun):
+        self.name, self.category, self.rerun = name, category, rerun
+
+    def __enter__(self):
+        self.child_seconds = 0.0
+        self.rss = _rss_mb()
+        if self.rerun is not None:
+            self.rerun.stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        with _lock:
+            count, total, worst = _totals.get(self.name, (0, 0.0, 0.0))
+            _totals[self.name] = (count + 1, total + seconds, max(worst, seconds))
+        rerun = self.rerun
+        if rerun is None:
+            return False
+        rerun.last_end = time.perf_counter()
+        if rerun.stack and rerun.stack[-1] is self:
+            rerun.stack.pop()
+        if rerun.stack:
+            # Parents report self time only, so category totals never double count
+            rerun.stack[-1].child_seconds += seconds
+        if len(rerun.spans) >= MAX_SPANS_PER_RERUN:
+            # Spans in a tight loop: still counted in span_totals(), not listed per rerun
+            rerun.dropped_spans += 1
+            return False
+        rerun.spans.append({
+            "name": self.name,
+            "category": self.category,
+            "seconds": round(seconds, 4),
+            "self_seconds": round(seconds - self.child_seconds, 4),
+            "rss_delta_mb": _delta(self.rss, _rss_mb()),
+            "error": exc_type.__name__ if exc_type else None,
+        })
+        return False
+
+
+def span(name, category="render"):
+    """Context manager timing `name`; a shared no-op when instrumentation is off."""
+    if not _enabled:
+        return _NOOP
+    return _Span(name, category, _active.get(_session_key()) if _active else None)
+
+
+def traced(name=None, category="render"):
+    """Decorator form of span()."""
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with span(label, category):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# --------------------
+# Reading results
+# --------------------
+def recent_reruns():
+    with _lock:
+        return list(_recent)
+
+
+def span_totals():
+    """Process-wide {span name: {"count", "seconds", "max_seconds"}}, including spans outside reruns."""
+    with _lock:
+        return {name: {"count": c, "seconds": round(t, 4), "max_seconds": round(m, 4)}
+                for name, (c, t, m) in _totals.items()}
+
+
+def reset():
+    with _lock:
+        _recent.clear()
+        _totals.clear()
+
+
+def load_log(path=None, limit=None):
+    """Records from the JSON lines log, oldest first (the last `limit` if given)."""
+    path = path or _log_path
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        lines = deque(f, maxlen=limit) if limit else f.readlines()
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue   # a line cut short by a crash
+    return records
+
+
+def summarize(records):
+    """Per (page, span) latency summary of rerun records, as a DataFrame.
+
+    Whole-run totals are "(rerun)" for runs that finished normally; runs that
+    ended otherwise get their own row, e.g. "(rerun: error)", so they do not
+    skew the headline latency.
+    """
+    import pandas as pd
+
+    rows = [{"page": r["page"], "span": s["name"], "category": s["category"], "seconds": s["seconds"],
+             "rss_delta_mb": s["rss_delta_mb"]} for r in records for s in r.get("spans", [])]
+    rows += [{"page": r["page"], "span": "(rerun)" if r.get("status", "ok") == "ok" else f"(rerun: {r['status']})",
+              "category": "total", "seconds": r["seconds"], "rss_delta_mb": r["rss_delta_mb"]} for r in records]
+    if not rows:
+        return pd.DataFrame(columns=["page", "span", "category", "count", "mean", "p50", "p95", "max",
+                                     "mean_rss_delta_mb"])
+    df = pd.DataFrame(rows)
+    grouped = df.groupby(["page", "span", "category"])
+    out = grouped["seconds"].agg(count="count", mean="mean", p50="median", max="max")
+    out["p95"] = grouped["seconds"].quantile(0.95)
+    out["mean_rss_delta_mb"] = grouped["rss_delta_mb"].mean()
+    out = out[["count", "mean", "p50", "p95", "max", "mean_rss_delta_mb"]].round(4)
+    return out.reset_index().sort_values(["page", "mean"], ascending=[True, False], ignore_index=True)
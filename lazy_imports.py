@@ -0,0 +1,106 @@
+# lazy_imports.py
+# Defer heavy imports (shap, sklearn, statsmodels, seaborn, ...) until the code
+# path that needs them runs.
+#
+#   shap = lazy("shap")            # nothing is imported yet
+#   shap.TreeExplainer(model)      # the first attribute access imports shap
+#   warm_up("shap", "seaborn")     # or import them in a background thread after first paint
+import importlib
+import importlib.util
+import sys
+import threading
+import time
+import types
+
+# module name -> seconds spent importing it through this module
+_import_seconds = {}
+_warmed = set()
+_lock = threading.Lock()
+
+
+def _is_loaded(name):
+    """True if `name` is in sys.modules and has finished executing (not mid-import on another thread)."""
+    module = sys.modules.get(name)
+    return module is not None and not getattr(getattr(module, "__spec__", None), "_initializing", False)
+
+
+def _import(name):
+    # Always go through import_module: if warm_up() is still importing `name` on
+    # another thread, it waits on the per-module import lock instead of handing
+    # back the partially initialised module from sys.modules
+    loaded = _is_loaded(name)
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    if not loaded:
+        with _lock:
+            _import_seconds.setdefault(name, time.perf_counter() - start)
+    return module
+
+
+class LazyModule(types.ModuleType):
+    """Stands in for a module and imports it on first attribute access."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            # importlib's per-module lock makes concurrent first uses (and warm_up) safe
+            module = _import(self.__name__)
+            self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        value = getattr(self._load(), attr)
+        # Later lookups of the same name skip __getattr__ entirely
+        self.__dict__[attr] = value
+        return value
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy(name):
+    """A proxy for module `name`; returns the real module if it is already fully imported."""
+    return sys.modules[name] if _is_loaded(name) else LazyModule(name)
+
+
+def is_available(name):
+    """True if the package that provides `name` is installed, without importing it."""
+    try:
+        # find_spec on a dotted name would import the parent package
+        return importlib.util.find_spec(name.partition(".")[0]) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def warm_up(*names):
+    """Import `names` in a daemon thread (once per process), so later code paths find them loaded."""
+    with _lock:
+        pending = [n for n in names if n not in _warmed and n not in sys.modules]
+        _warmed.update(pending)
+    if not pending:
+        return None
+
+    def run():
+        for name in pending:
+            try:
+                _import(name)
+            except Exception:
+                pass  # the real use site will raise a proper ImportError
+
+    thread = threading.Thread(target=run, name="lazy-import-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def import_times():
+    """Seconds spent importing each module loaded through lazy() or warm_up()."""
+    with _lock:
+        return dict(_import_seconds)
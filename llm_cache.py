@@ -0,0 +1,161 @@
+# llm_cache.py
+# Shared on-disk cache for deterministic LLM calls (temperature 0).
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    latency REAL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache (last_access);
+"""
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so trivially different prompts share an entry."""
+    if isinstance(prompt, str):
+        return re.sub(r"\s+", " ", prompt).strip()
+    return [{**m, "content": normalize_prompt(m.get("content", ""))} for m in prompt]
+
+
+def cache_key(endpoint, model, prompt, params=None):
+    """`endpoint` names the provider that answers (e.g. "poe https://.../chat/completions"),
+    so the same model name served by different backends or URLs never shares entries."""
+    raw = json.dumps([endpoint, model, normalize_prompt(prompt), params or {}], sort_keys=True,
+                     ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Responses keyed by (endpoint, model, normalized prompt, params), with TTL and size-based LRU eviction.
+
+    Concurrent calls for the same key inside one process are coalesced: the
+    first caller makes the request and the others wait for its result.
+    """
+
+    def __init__(self, path="llm_cache.db", ttl=7 * 24 * 3600, max_bytes=200 * 1024 * 1024):
+        self.path, self.ttl, self.max_bytes = path, ttl, max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "saved_seconds": 0.0, "evicted": 0}
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def get(self, key):
+        conn = self._conn()
+        row = conn.execute("SELECT value, latency, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, latency, created_at = row
+        now = time.time()
+        if now - created_at > self.ttl:
+            with conn:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            return None
+        with conn:
+            conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+        self._count("saved_seconds", latency or 0.0)
+        return value
+
+    def put(self, key, model, value, latency):
+        conn = self._conn()
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, value, size, latency, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, value, size, latency, now, now),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries down to 90% of the budget
+        excess, evicted = total - int(self.max_bytes * 0.9), []
+        for key, size in conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access"):
+            if excess <= 0:
+                break
+            evicted.append((key,))
+            excess -= size
+        conn.executemany("DELETE FROM llm_cache WHERE key = ?", evicted)
+        self._count("evicted", len(evicted))
+
+    def get_or_call(self, endpoint, model, prompt, params, call):
+        """Return the cached answer, or run `call()` once and cache its result."""
+        key = cache_key(endpoint, model, prompt, params)
+        value = self.get(key)
+        if value is not None:
+            self._count("hits")
+            return value
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            value, latency = future.result()
+            self._count("coalesced")
+            # The follower waited for the leader's call instead of making its own
+            self._count("saved_seconds", latency)
+            return value
+
+        try:
+            # A previous leader may have stored the answer between our get() and taking the slot
+            value = self.get(key)
+            if value is not None:
+                self._count("hits")
+                future.set_result((value, 0.0))
+                return value
+            self._count("misses")
+            start = time.perf_counter()
+            value = call()
+            latency = time.perf_counter() - start
+            self.put(key, model, value, latency)
+            future.set_result((value, latency))
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = (stats["hits"] + stats["coalesced"]) / lookups if lookups else 0.0
+        row = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        stats["entries"], stats["bytes"] = row
+        return stats
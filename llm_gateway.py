@@ -0,0 +1,342 @@
+# llm_gateway.py
+# One gateway for every LLM call in the app (POE, ZhipuAI, and a mock for load tests).
+#
+# Each backend reuses its connections (one pooled requests.Session for POE,
+# one client per API key for ZhipuAI) and has its own concurrency limit.
+# Calls get timeouts, retries with jittered exponential backoff on transient
+# errors, and per-backend latency/token/error metrics.
+import asyncio
+import json
+import random
+import statistics
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from chat_context import estimate_tokens
+from instrumentation import span
+
+POE_API_URL = "https://api.poe.com/v1/chat/completions"
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class GatewayError(RuntimeError):
+    pass
+
+
+def _status_code(exc):
+    code = getattr(exc, "status_code", None)
+    if code is None and getattr(exc, "response", None) is not None:
+        code = getattr(exc.response, "status_code", None)
+    return code
+
+
+def is_retryable(exc):
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if _status_code(exc) in RETRYABLE_STATUS:
+        return True
+    # zhipuai raises APITimeoutError / APIConnectionError without status codes
+    name = type(exc).__name__
+    return "Timeout" in name or "Connection" in name
+
+
+# --------------------
+# Backends
+# --------------------
+class Backend:
+    """A provider. `complete` returns (text, usage); `stream` yields deltas and fills `usage`."""
+
+    name = "backend"
+
+    def __init__(self, max_concurrency=8):
+        self.max_concurrency = max_concurrency
+
+    def complete(self, model, messages, api_key=None, url=None, timeout=60, **params):
+        raise NotImplementedError
+
+    def stream(self, model, messages, usage, api_key=None, url=None, timeout=60, **params):
+        raise NotImplementedError
+
+
+class PoeBackend(Backend):
+    """POE's OpenAI-compatible chat completions API over a pooled keep-alive session."""
+
+    name = "poe"
+
+    def __init__(self, url=POE_API_URL, max_concurrency=16):
+        super().__init__(max_concurrency)
+        self.url = url
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @staticmethod
+    def _headers(api_key):
+        return {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+
+    def complete(self, model, messages, api_key=None, url=None, timeout=60, **params):
+        res = self.session.post(
+            url or self.url, headers=self._headers(api_key),
+            json={"model": model, "messages": messages, **params}, timeout=timeout,
+        )
+        res.raise_for_status()
+        body = res.json()
+        return body["choices"][0]["message"]["content"].strip(), body.get("usage") or {}
+
+    def stream(self, model, messages, usage, api_key=None, url=None, timeout=60, **params):
+        res = self.session.post(
+            url or self.url, headers={**self._headers(api_key), "Accept": "text/event-stream"},
+            json={"model": model, "messages": messages, "stream": True, **params},
+            timeout=timeout, stream=True,
+        )
+        res.raise_for_status()
+        # event-stream responses often omit the charset; requests would assume latin-1
+        res.encoding = "utf-8"
+        try:
+            for line in res.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+                if not payload:
+                    continue
+                event = json.loads(payload)
+                usage.update(event.get("usage") or {})
+                choices = event.get("choices") or [{}]
+                delta = (choices[0].get("delta") or {}).get("content")
+                if delta:
+                    yield delta
+        finally:
+            res.close()
+
+
+class ZhipuBackend(Backend):
+    """ZhipuAI GLM models; one SDK client (and its HTTP pool) per API key."""
+
+    name = "zhipu"
+
+    def __init__(self, max_concurrency=4):
+        super().__init__(max_concurrency)
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def client(self, api_key, timeout):
+        with self._lock:
+            if api_key not in self._clients:
+                from zhipuai import ZhipuAI
+                # Retries are handled by the gateway, not the SDK
+                self._clients[api_key] = ZhipuAI(api_key=api_key, timeout=timeout, max_retries=0)
+            return self._clients[api_key]
+
+    def complete(self, model, messages, api_key=None, url=None, timeout=60, **params):
+        response = self.client(api_key, timeout).chat.completions.create(
+            model=model, messages=messages, **params)
+        usage = response.usage.model_dump() if getattr(response, "usage", None) else {}
+        return response.choices[0].message.content, usage
+
+    def stream(self, model, messages, usage, api_key=None, url=None, timeout=60, **params):
+        response = self.client(api_key, timeout).chat.completions.create(
+            model=model, messages=messages, stream=True, **params)
+        for chunk in response:
+            if getattr(chunk, "usage", None):
+                usage.update(chunk.usage.model_dump())
+            delta = chunk.choices[0].delta if chunk.choices else None
+            if delta is not None and getattr(delta, "content", None):
+                yield delta.content
+
+
+class MockBackend(Backend):
+    """Offline provider for load tests: fixed latency, per-token delay and injected failures."""
+
+    name = "mock"
+
+    def __init__(self, latency=0.05, token_delay=0.0, failure_rate=0.0, answer=None, max_concurrency=32,
+                 seed=None):
+        super().__init__(max_concurrency)
+        self.latency, self.token_delay, self.failure_rate = latency, token_delay, failure_rate
+        self.answer = answer or "Demand falls as price rises, other things equal."
+        self._rng = random.Random(seed)
+
+    def _maybe_fail(self):
+        if self._rng.random() < self.failure_rate:
+            error = GatewayError("mock: service unavailable")
+            error.status_code = 503
+            raise error
+
+    def complete(self, model, messages, api_key=None, url=None, timeout=60, **params):
+        time.sleep(self.latency)
+        self._maybe_fail()
+        return self.answer, {}
+
+    def stream(self, model, messages, usage, api_key=None, url=None, timeout=60, **params):
+        time.sleep(self.latency)
+        self._maybe_fail()
+        for i, word in enumerate(self.answer.split(" ")):
+            time.sleep(self.token_delay)
+            yield ("" if i == 0 else " ") + word
+
+
+# --------------------
+# Metrics
+# --------------------
+class _BackendMetrics:
+    def __init__(self, window=1000):
+        self.calls = self.errors = self.retries = 0
+        self.prompt_tokens = self.completion_tokens = 0
+        self.latencies = deque(maxlen=window)
+        self.first_token = deque(maxlen=window)
+
+    def snapshot(self):
+        lat = sorted(self.latencies)
+
+        def pct(values, q):
+            return values[int(q * (len(values) - 1))] if values else None
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "error_rate": self.errors / self.calls if self.calls else 0.0,
+            "p50_seconds": pct(lat, 0.5),
+            "p95_seconds": pct(lat, 0.95),
+            "mean_ttft_seconds": statistics.fmean(self.first_token) if self.first_token else None,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+# --------------------
+# Gateway
+# --------------------
+class LLMStream:
+    """Iterates text deltas; afterwards holds text, usage, time_to_first_token and total_seconds."""
+
+    def __init__(self, gateway, backend, model, messages, call_kwargs):
+        self._gateway, self._backend = gateway, backend
+        self._model, self._messages, self._kwargs = model, messages, call_kwargs
+        self.text = ""
+        self.usage = {}
+        self.time_to_first_token = None
+        self.total_seconds = None
+
+    def __iter__(self):
+        return self._gateway._run_stream(self)
+
+
+class Gateway:
+    def __init__(self, backends=None, max_retries=3, backoff_base=0.5, backoff_cap=8.0, timeout=60):
+        self.backends = {}
+        self.max_retries, self.backoff_base, self.backoff_cap = max_retries, backoff_base, backoff_cap
+        self.timeout = timeout
+        self._limits = {}
+        self._metrics = {}
+        self._lock = threading.Lock()
+        for backend in backends or []:
+            self.register(backend)
+
+    def register(self, backend, name=None):
+        name = name or backend.name
+        self.backends[name] = backend
+        self._limits[name] = threading.BoundedSemaphore(backend.max_concurrency)
+        self._metrics[name] = _BackendMetrics()
+        return backend
+
+    def _backoff(self, attempt):
+        # "Full jitter": uniform in [0, min(cap, base * 2^attempt)]
+        time.sleep(random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt)))
+
+    def _record(self, name, seconds=None, ttft=None, usage=None, messages=None, text="", error=False,
+                retries=0):
+        m = self._metrics[name]
+        usage = usage or {}
+        with self._lock:
+            m.calls += 1
+            m.retries += retries
+            if error:
+                m.errors += 1
+                return
+            m.latencies.append(seconds)
+            if ttft is not None:
+                m.first_token.append(ttft)
+            m.prompt_tokens += usage.get("prompt_tokens") or sum(
+                estimate_tokens(x.get("content", "")) for x in messages or [])
+            m.completion_tokens += usage.get("completion_tokens") or estimate_tokens(text)
+
+    def complete(self, backend, model, messages, api_key=None, url=None, timeout=None, **params):
+        """Blocking completion through `backend`; returns the answer text."""
+        impl = self.backends[backend]
+        timeout = timeout or self.timeout
+        attempt = 0
+        # The span includes time spent waiting for the backend's concurrency slot
+        with span(f"llm:{backend}", "llm"), self._limits[backend]:
+            start = time.perf_counter()
+            while True:
+                try:
+                    text, usage = impl.complete(model, messages, api_key=api_key, url=url, timeout=timeout, **params)
+                    break
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable(e):
+                        self._record(backend, error=True, retries=attempt)
+                        raise
+                    attempt += 1
+                    self._backoff(attempt)
+            self._record(backend, time.perf_counter() - start, usage=usage, messages=messages, text=text,
+                         retries=attempt)
+        return text
+
+    def stream(self, backend, model, messages, api_key=None, url=None, timeout=None, **params):
+        """Streaming completion; iterate the returned LLMStream for text deltas."""
+        return LLMStream(self, backend, model, messages,
+                         {"api_key": api_key, "url": url, "timeout": timeout or self.timeout, **params})
+
+    def _run_stream(self, s):
+        name, impl = s._backend, self.backends[s._backend]
+        attempt = 0
+        with span(f"llm:{name}", "llm"), self._limits[name]:
+            start = time.perf_counter()
+            while True:
+                try:
+                    for delta in impl.stream(s._model, s._messages, s.usage, **s._kwargs):
+                        if s.time_to_first_token is None:
+                            s.time_to_first_token = time.perf_counter() - start
+                        s.text += delta
+                        yield delta
+                    break
+                except Exception as e:
+                    # Only retry if nothing has been shown to the user yet
+                    if s.text or attempt >= self.max_retries or not is_retryable(e):
+                        s.total_seconds = time.perf_counter() - start
+                        self._record(name, error=True, retries=attempt)
+                        raise
+                    attempt += 1
+                    self._backoff(attempt)
+            s.total_seconds = time.perf_counter() - start
+            self._record(name, s.total_seconds, ttft=s.time_to_first_token, usage=s.usage,
+                         messages=s._messages, text=s.text, retries=attempt)
+
+    async def acomplete(self, backend, model, messages, **kwargs):
+        """Awaitable complete(); the backend's semaphore still bounds concurrency."""
+        return await asyncio.to_thread(self.complete, backend, model, messages, **kwargs)
+
+    def metrics(self):
+        with self._lock:
+            return {name: m.snapshot() for name, m in self._metrics.items()}
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """The process-wide gateway shared by all pages and sessions."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = Gateway([PoeBackend(), ZhipuBackend(), MockBackend()])
+        return _gateway
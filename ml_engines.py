@@ -0,0 +1,275 @@
+# ml_engines.py
+# Model engines for the Machine Learning page: random forests plus histogram
+# gradient boosting (sklearn HistGradientBoosting* and xgboost "hist").
+import inspect
+import multiprocessing
+import os
+import time
+import threading
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from lazy_imports import is_available, lazy
+
+# sklearn and xgboost take seconds to import; load them on first fit
+ensemble = lazy("sklearn.ensemble")
+inspection = lazy("sklearn.inspection")
+model_selection = lazy("sklearn.model_selection")
+preprocessing = lazy("sklearn.preprocessing")
+xgb = lazy("xgboost") if is_available("xgboost") else None
+
+RANDOM_FOREST = "Random Forest"
+SKLEARN_HIST = "HistGradientBoosting (sklearn)"
+XGBOOST_HIST = "XGBoost (hist)"
+
+
+def available_engines():
+    engines = [RANDOM_FOREST, SKLEARN_HIST]
+    if xgb is not None:
+        engines.append(XGBOOST_HIST)
+    return engines
+
+
+def default_threads():
+    return os.cpu_count() or 1
+
+
+class BoosterModel:
+    """Thin predict/feature_importances_ wrapper around a trained xgboost Booster."""
+
+    def __init__(self, booster, feature_names, problem_type, label_encoder=None, n_jobs=-1):
+        self.booster = booster
+        self.feature_names = list(feature_names)
+        self.problem_type = problem_type
+        self.label_encoder = label_encoder
+        self.n_jobs = n_jobs
+
+    @property
+    def best_iteration(self):
+        return getattr(self.booster, "best_iteration", None)
+
+    def predict(self, X):
+        dmatrix = xgb.DMatrix(X[self.feature_names] if isinstance(X, pd.DataFrame) else X,
+                              feature_names=self.feature_names, nthread=self.n_jobs)
+        if self.best_iteration is not None:
+            raw = self.booster.predict(dmatrix, iteration_range=(0, self.best_iteration + 1))
+        else:
+            raw = self.booster.predict(dmatrix)
+        if self.problem_type == "regression":
+            return raw
+        codes = np.argmax(raw, axis=1) if raw.ndim == 2 else (raw > 0.5).astype(int)
+        return self.label_encoder.inverse_transform(codes)
+
+    @property
+    def feature_importances_(self):
+        gains = self.booster.get_score(importance_type="gain")
+        values = np.array([gains.get(name, 0.0) for name in self.feature_names], dtype=float)
+        total = values.sum()
+        return values / total if total > 0 else values
+
+
+def prepare_training_matrix(engine, problem_type, X_train, y_train, valid_fraction=0.1,
+                            max_bin=255, n_jobs=-1, random_state=42):
+    """Split off an early-stopping validation set and build the engine's inputs once.
+
+    For xgboost the training data is quantised into a QuantileDMatrix (the
+    histogram bins) so repeated fits on the same split skip the binning step.
+    """
+    X_train = X_train.astype(np.float32)
+    matrix = {"engine": engine, "problem_type": problem_type, "feature_names": list(X_train.columns)}
+    if engine == RANDOM_FOREST:
+        matrix.update(X_fit=X_train, y_fit=y_train)
+        return matrix
+
+    stratify = y_train if problem_type == "classification" and y_train.value_counts().min() > 1 else None
+    X_fit, X_valid, y_fit, y_valid = model_selection.train_test_split(
+        X_train, y_train, test_size=valid_fraction, random_state=random_state, stratify=stratify
+    )
+    matrix.update(X_fit=X_fit, y_fit=y_fit, X_valid=X_valid, y_valid=y_valid)
+
+    if engine == XGBOOST_HIST:
+        encoder = None
+        label_fit, label_valid = y_fit, y_valid
+        if problem_type == "classification":
+            encoder = preprocessing.LabelEncoder().fit(y_train)
+            label_fit, label_valid = encoder.transform(y_fit), encoder.transform(y_valid)
+        dtrain = xgb.QuantileDMatrix(X_fit, label=label_fit, max_bin=max_bin, nthread=n_jobs)
+        dvalid = xgb.QuantileDMatrix(X_valid, label=label_valid, ref=dtrain, max_bin=max_bin, nthread=n_jobs)
+        matrix.update(dtrain=dtrain, dvalid=dvalid, label_encoder=encoder, max_bin=max_bin)
+    else:
+        matrix.update(max_bin=max_bin)
+    return matrix
+
+
+def fit_engine(matrix, n_jobs=-1, n_estimators=500, early_stopping_rounds=20, random_state=42):
+    """Fit the engine described by `matrix` and return a model exposing predict()."""
+    engine, problem_type = matrix["engine"], matrix["problem_type"]
+
+    if engine == RANDOM_FOREST:
+        model_cls = ensemble.RandomForestRegressor if problem_type == "regression" else ensemble.RandomForestClassifier
+        model = model_cls(n_jobs=n_jobs, random_state=random_state)
+        return model.fit(matrix["X_fit"], matrix["y_fit"])
+
+    if engine == SKLEARN_HIST:
+        model_cls = (ensemble.HistGradientBoostingRegressor if problem_type == "regression"
+                     else ensemble.HistGradientBoostingClassifier)
+        X_fit, y_fit, X_valid, y_valid = matrix["X_fit"], matrix["y_fit"], matrix["X_valid"], matrix["y_valid"]
+        # fit(X_val=, y_val=) is scikit-learn 1.7+; older versions hold out their own
+        # validation split, so hand them fit + valid rows and the same fraction
+        explicit_validation = "X_val" in inspect.signature(model_cls.fit).parameters
+        model = model_cls(
+            max_iter=n_estimators,
+            max_bins=min(matrix["max_bin"], 255),
+            early_stopping=True,
+            n_iter_no_change=early_stopping_rounds,
+            validation_fraction=None if explicit_validation else len(X_valid) / (len(X_fit) + len(X_valid)),
+            random_state=random_state,
+        )
+        # HistGradientBoosting* threads through OpenMP; limit them for this fit only.
+        with threadpool_limits(limits=n_jobs if n_jobs > 0 else None, user_api="openmp"):
+            if explicit_validation:
+                model.fit(X_fit, y_fit, X_val=X_valid, y_val=y_valid)
+            else:
+                model.fit(pd.concat([X_fit, X_valid]), pd.concat([y_fit, y_valid]))
+        return model
+
+    params = {"tree_method": "hist", "max_bin": matrix["max_bin"], "nthread": n_jobs, "seed": random_state}
+    encoder = matrix.get("label_encoder")
+    if problem_type == "regression":
+        params.update(objective="reg:squarederror", eval_metric="rmse")
+    elif len(encoder.classes_) > 2:
+        params.update(objective="multi:softprob", num_class=len(encoder.classes_), eval_metric="mlogloss")
+    else:
+        params.update(objective="binary:logistic", eval_metric="logloss")
+    booster = xgb.train(
+        params,
+        matrix["dtrain"],
+        num_boost_round=n_estimators,
+        evals=[(matrix["dvalid"], "valid")],
+        early_stopping_rounds=early_stopping_rounds,
+        verbose_eval=False,
+    )
+    return BoosterModel(booster, matrix["feature_names"], problem_type, encoder, n_jobs)
+
+
+def feature_importances(model, X, y, n_jobs=-1, random_state=42):
+    """Impurity/gain importances when the engine has them, permutation importances otherwise."""
+    if hasattr(model, "feature_importances_"):
+        return np.asarray(model.feature_importances_)
+    result = inspection.permutation_importance(model, X, y, n_repeats=5, n_jobs=n_jobs, random_state=random_state)
+    return result.importances_mean
+
+
+def explainable_model(model):
+    """Object to hand to shap.TreeExplainer."""
+    return model.booster if isinstance(model, BoosterModel) else model
+
+
+def make_estimator(engine, problem_type, n_jobs=-1, n_estimators=500, early_stopping_rounds=20,
+                   max_bin=255, random_state=42):
+    """Unfitted sklearn-API estimator for cross-validation."""
+    if engine == RANDOM_FOREST:
+        model_cls = ensemble.RandomForestRegressor if problem_type == "regression" else ensemble.RandomForestClassifier
+        return model_cls(n_jobs=n_jobs, random_state=random_state)
+    if engine == SKLEARN_HIST:
+        model_cls = (ensemble.HistGradientBoostingRegressor if problem_type == "regression"
+                     else ensemble.HistGradientBoostingClassifier)
+        return model_cls(max_iter=n_estimators, max_bins=min(max_bin, 255), early_stopping=True,
+                         n_iter_no_change=early_stopping_rounds, random_state=random_state)
+    model_cls = xgb.XGBRegressor if problem_type == "regression" else xgb.XGBClassifier
+    return model_cls(tree_method="hist", n_estimators=n_estimators, max_bin=max_bin,
+                     n_jobs=n_jobs, random_state=random_state)
+
+
+def cross_validate_engine(engine, problem_type, X, y, cv=5, n_jobs=-1, **params):
+    scoring = "neg_root_mean_squared_error" if problem_type == "regression" else "accuracy"
+    if problem_type == "classification":
+        y = preprocessing.LabelEncoder().fit_transform(y)
+    estimator = make_estimator(engine, problem_type, n_jobs=n_jobs, **params)
+    return model_selection.cross_val_score(estimator, X.astype(np.float32), y, cv=cv, scoring=scoring)
+
+
+# --------------------
+# Fit cost measurement
+# --------------------
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def measure(fn, *args, interval=0.01, **kwargs):
+    """Run fn and return (result, seconds, peak_memory_mb).
+
+    Peak memory is the resident-set growth sampled during the call (Linux);
+    elsewhere it falls back to tracemalloc, which only sees Python allocations.
+    """
+    baseline = _rss_bytes()
+    if baseline is None:
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        return result, seconds, peak / 1e6
+
+    peak = [baseline]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(interval):
+            peak[0] = max(peak[0], _rss_bytes() or 0)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - start
+        done.set()
+        sampler.join()
+    peak[0] = max(peak[0], _rss_bytes() or 0)
+    return result, seconds, (peak[0] - baseline) / 1e6
+
+
+def _measure_engine(engine, problem_type, X_train, y_train, n_jobs, n_estimators, early_stopping_rounds,
+                    max_bin):
+    # Runs in a fresh process: import the libraries first so only the fit itself is measured
+    ensemble.RandomForestRegressor, model_selection.train_test_split, preprocessing.LabelEncoder
+    if engine == XGBOOST_HIST:
+        xgb.QuantileDMatrix
+
+    def build_and_fit():
+        matrix = prepare_training_matrix(engine, problem_type, X_train, y_train, max_bin=max_bin, n_jobs=n_jobs)
+        return fit_engine(matrix, n_jobs=n_jobs, n_estimators=n_estimators,
+                          early_stopping_rounds=early_stopping_rounds)
+
+    _, seconds, peak_mb = measure(build_and_fit)
+    return seconds, peak_mb
+
+
+def compare_engines(engines, problem_type, X_train, y_train, n_jobs=-1, n_estimators=500,
+                    early_stopping_rounds=20, max_bin=255):
+    """Fit each engine on the same split and report fit time and peak memory.
+
+    Each engine is fitted in its own fresh process, so its peak memory is not
+    hidden by memory that an earlier fit already added to the heap.
+    """
+    rows = []
+    context = multiprocessing.get_context("spawn")
+    for engine in engines:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            seconds, peak_mb = pool.submit(_measure_engine, engine, problem_type, X_train, y_train, n_jobs,
+                                           n_estimators, early_stopping_rounds, max_bin).result()
+        rows.append({"engine": engine, "fit_seconds": round(seconds, 3), "peak_memory_mb": round(peak_mb, 1)})
+    return pd.DataFrame(rows)
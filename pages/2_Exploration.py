@@ -3,21 +3,30 @@ import streamlit as st
 
 
 import streamlit as st
-import seaborn as sns
-import matplotlib.pyplot as plt
 import pandas as pd
 
-st.title("🔍 Exploratory Data Analysis")
+import instrumentation
+from lazy_imports import lazy
 
-df = st.session_state.get("df")
-if df is not None:
-    st.write("## Correlation Matrix")
-    selected = st.multiselect("Choose variables:", df.select_dtypes(include='number').columns.tolist())
-    if selected:
-        corr = df[selected].corr()
-        sns.heatmap(corr, annot=True, cmap="coolwarm")
-        st.pyplot(plt.gcf())
-        plt.clf()
-    st.write("## Descriptive Statistics", df.describe())
-else:
-    st.warning("Upload a dataset first.")
+sns = lazy("seaborn")
+plt = lazy("matplotlib.pyplot")
+
+with instrumentation.rerun("Exploration"):
+    st.title("🔍 Exploratory Data Analysis")
+
+    df = st.session_state.get("df")
+    if df is not None:
+        st.write("## Correlation Matrix")
+        selected = st.multiselect("Choose variables:", df.select_dtypes(include='number').columns.tolist())
+        if selected:
+            with instrumentation.span("correlation", "fit"):
+                corr = df[selected].corr()
+            with instrumentation.span("heatmap", "render"):
+                sns.heatmap(corr, annot=True, cmap="coolwarm")
+                st.pyplot(plt.gcf())
+                plt.clf()
+        with instrumentation.span("describe", "fit"):
+            description = df.describe()
+        st.write("## Descriptive Statistics", description)
+    else:
+        st.warning("Upload a dataset first.")
@@ -3,22 +3,29 @@ import streamlit as st
 
 import streamlit as st
 import pandas as pd
-from sklearn.linear_model import LinearRegression
 import numpy as np
 
-st.title("🤖 Forecasting (Beta)")
+import instrumentation
+from lazy_imports import lazy
 
-df = st.session_state.get("df")
-if df is not None:
-    target = st.selectbox("Select variable to forecast", df.select_dtypes(include='number').columns)
-    steps = st.slider("Forecast steps", 1, 20, 5)
+linear_model = lazy("sklearn.linear_model")
 
-    if target:
-        y = df[target].dropna().values.reshape(-1, 1)
-        X = np.arange(len(y)).reshape(-1, 1)
-        model = LinearRegression().fit(X, y)
-        future = model.predict(np.arange(len(y), len(y)+steps).reshape(-1, 1))
+with instrumentation.rerun("Prediction"):
+    st.title("🤖 Forecasting (Beta)")
 
-        st.line_chart(np.concatenate([y, future]))
-else:
-    st.warning("Upload a dataset first.")
+    df = st.session_state.get("df")
+    if df is not None:
+        target = st.selectbox("Select variable to forecast", df.select_dtypes(include='number').columns)
+        steps = st.slider("Forecast steps", 1, 20, 5)
+
+        if target:
+            y = df[target].dropna().values.reshape(-1, 1)
+            X = np.arange(len(y)).reshape(-1, 1)
+            with instrumentation.span("trend_forecast", "fit"):
+                model = linear_model.LinearRegression().fit(X, y)
+                future = model.predict(np.arange(len(y), len(y)+steps).reshape(-1, 1))
+
+            with instrumentation.span("forecast_chart", "render"):
+                st.line_chart(np.concatenate([y, future]))
+    else:
+        st.warning("Upload a dataset first.")
@@ -1,72 +1,83 @@
 import streamlit as st
-from zhipuai import ZhipuAI
+import llm_gateway
+from chat_context import build_context, ThrottledMarkdown
+import instrumentation
 
-st.set_page_config(page_title="🧠 AI Economics Assistant (GLM-4.5)", layout="centered")
-st.title("🧠 AI Economics Assistant (GLM-4.5)")
+with instrumentation.rerun("AI Economics Assistant"):
+    st.set_page_config(page_title="🧠 AI Economics Assistant (GLM-4.5)", layout="centered")
+    st.title("🧠 AI Economics Assistant (GLM-4.5)")
 
-# API Key input
-api_key = st.text_input("af323011bfb84e9588262117c594c339.ltAjuvZibUD0IAXs", type="password")
+    # API Key input
+    api_key = st.text_input("af323011bfb84e9588262117c594c339.ltAjuvZibUD0IAXs", type="password")
 
-# Initialize or load chat history
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = [
-        {"role": "system", "content": "You are an expert in economics."}
-    ]
+    # Initialize or load chat history
+    if "chat_history" not in st.session_state:
+        st.session_state.chat_history = [
+            {"role": "system", "content": "You are an expert in economics."}
+        ]
 
-# Display chat history
-for msg in st.session_state.chat_history[1:]:  # skip system message
-    if msg["role"] == "user":
-        st.markdown(f"🧑 **You:** {msg['content']}")
-    else:
-        st.markdown(f"🤖 **Assistant:** {msg['content']}")
+    # Display chat history
+    for msg in st.session_state.chat_history[1:]:  # skip system message
+        if msg["role"] == "user":
+            st.markdown(f"🧑 **You:** {msg['content']}")
+        else:
+            st.markdown(f"🤖 **Assistant:** {msg['content']}")
 
-# Prompt input
-user_input = st.text_area("💬 Your question:", height=150)
+    # Prompt input
+    user_input = st.text_area("💬 Your question:", height=150)
 
-# Optional settings
-with st.expander("🧠 Model Options"):
-    model = st.selectbox(
-        "Choose a model",
-        ["glm-4", "glm-4f", "glm-4b"],
-        index=0
-    )
+    # Optional settings
+    with st.expander("🧠 Model Options"):
+        model = st.selectbox(
+            "Choose a model",
+            ["glm-4", "glm-4f", "glm-4b"],
+            index=0
+        )
 
-with st.expander("🔧 Advanced Settings"):
-    temperature = st.slider("Temperature (creativity)", 0.0, 1.0, 0.7, 0.05)
-    max_tokens = st.slider("Max tokens (response length)", 256, 4096, 1024, 128)
+    with st.expander("🔧 Advanced Settings"):
+        temperature = st.slider("Temperature (creativity)", 0.0, 1.0, 0.7, 0.05)
+        max_tokens = st.slider("Max tokens (response length)", 256, 4096, 1024, 128)
+        context_budget = st.slider("Context budget (prompt tokens)", 500, 16000, 4000, 500)
+        summarize_old = st.checkbox("Summarize turns that don't fit the budget", value=True)
+        render_fps = st.slider("Streaming render rate (updates/second)", 2, 30, 10)
 
-if st.button("Generate Answer"):
-    if not api_key:
-        st.error("❌ Please enter your ZhipuAI API key.")
-    elif not user_input.strip():
-        st.error("❌ Please write a prompt.")
-    else:
-        try:
-            client = ZhipuAI(api_key=api_key)
+    if st.button("Generate Answer"):
+        if not api_key:
+            st.error("❌ Please enter your ZhipuAI API key.")
+        elif not user_input.strip():
+            st.error("❌ Please write a prompt.")
+        else:
+            try:
+                # Shared gateway: one client per API key, retries and concurrency limits
+                gateway = llm_gateway.get_gateway()
 
-            # Add user input to chat history
-            st.session_state.chat_history.append({"role": "user", "content": user_input.strip()})
+                # Add user input to chat history
+                st.session_state.chat_history.append({"role": "user", "content": user_input.strip()})
 
-            # Send chat history to ZhipuAI
-            response = client.chat.completions.create(
-                model=model,
-                messages=st.session_state.chat_history,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                stream=True  # for streaming responses
-            )
+                # Send only as much history as fits the context budget
+                with instrumentation.span("build_context", "llm"):
+                    messages, context_info = build_context(st.session_state.chat_history, context_budget, summarize_old)
+                st.caption(f"Prompt: ~{context_info['prompt_tokens']} tokens · "
+                           f"{context_info['kept']} recent messages sent · "
+                           f"{context_info['dropped']} older messages {'summarized' if summarize_old else 'dropped'}")
+                response = gateway.stream(
+                    "zhipu",
+                    model,
+                    messages,
+                    api_key=api_key,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
 
-            # Stream response
-            answer_container = st.empty()
-            answer_text = ""
-            for chunk in response:
-                delta = chunk.choices[0].delta
-                if hasattr(delta, "content") and delta.content:
-                    answer_text += delta.content
-                    answer_container.markdown(answer_text)
+                # Stream response, re-rendering at a fixed frame rate rather than per chunk
+                answer_container = ThrottledMarkdown(st.empty(), fps=render_fps)
+                for delta in response:
+                    answer_container.append(delta)
+                answer_text = answer_container.flush()
+                st.caption(f"First token {response.time_to_first_token or 0:.2f}s · total {response.total_seconds:.2f}s")
 
-            # Save assistant response
-            st.session_state.chat_history.append({"role": "assistant", "content": answer_text})
+                # Save assistant response
+                st.session_state.chat_history.append({"role": "assistant", "content": answer_text})
 
-        except Exception as e:
-            st.error(f"❌ Error: {e}")
+            except Exception as e:
+                st.error(f"❌ Error: {e}")
@@ -0,0 +1,96 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+import instrumentation
+import lazy_imports
+
+st.set_page_config(page_title="Performance", layout="wide")
+st.title("⏱️ Performance")
+
+if not st.session_state.get("logged_in"):
+    st.warning("Log in on the home page first.")
+    st.stop()
+if not st.session_state.get("is_admin"):
+    # Settings here change every session in the process; mark admins with `admin: true` in config.yaml
+    st.error("This page is only available to administrators.")
+    st.stop()
+
+# --------------------
+# Settings (process-wide: they apply to every session)
+# --------------------
+current = instrumentation.settings()
+with st.form("instrumentation_settings"):
+    c1, c2 = st.columns(2)
+    enabled = c1.toggle("Instrumentation on", value=current["enabled"])
+    profile_rate = c2.slider("cProfile sample rate", 0.0, 1.0, current["profile_rate"], 0.05,
+                             help="Share of reruns run under cProfile. Profiling slows those reruns down.")
+    # The log location is deployment configuration (DATASTAT_PERF_LOG), not editable here
+    st.caption(f"JSON lines log: {current['log_path'] or 'off (DATASTAT_PERF_LOG is empty)'}")
+    if st.form_submit_button("Apply"):
+        instrumentation.configure(enabled=enabled, profile_rate=profile_rate)
+        st.rerun()
+
+if not current["enabled"]:
+    st.info("Instrumentation is off; spans cost almost nothing until it is switched on. "
+            "Set DATASTAT_INSTRUMENT=1 to enable it at startup.")
+
+# --------------------
+# Recent reruns (this process)
+# --------------------
+st.subheader("Recent reruns")
+reruns = instrumentation.recent_reruns()[::-1]
+if not reruns:
+    st.caption("No reruns recorded yet. Open a few pages with instrumentation on.")
+else:
+    table = pd.DataFrame([{
+        "time": pd.to_datetime(r["ts"], unit="s"),
+        "page": r["page"],
+        "status": r["status"],
+        "seconds": r["seconds"],
+        "rss_delta_mb": r["rss_delta_mb"],
+        "untracked_seconds": r["untracked_seconds"],
+        **{f"{k}_seconds": v for k, v in r["totals"].items()},
+        "profiled": "profile" in r,
+    } for r in reruns])
+    st.dataframe(table, use_container_width=True)
+
+    choice = st.selectbox("Inspect rerun", range(len(reruns)),
+                          format_func=lambda i: f"{table['time'][i]:%H:%M:%S} · {reruns[i]['page']} · "
+                                                f"{reruns[i]['seconds']:.2f}s")
+    selected = reruns[choice]
+    col_spans, col_totals = st.columns([3, 1])
+    with col_spans:
+        st.caption("Spans (self time excludes nested spans)")
+        st.dataframe(pd.DataFrame(selected["spans"]), use_container_width=True)
+        if selected.get("dropped_spans"):
+            st.caption(f"{selected['dropped_spans']} more spans not listed")
+    with col_totals:
+        st.caption("Seconds by category")
+        totals = {**selected["totals"], "untracked": selected["untracked_seconds"]}
+        st.bar_chart(pd.Series(totals, name="seconds"))
+    if "profile" in selected:
+        st.caption("cProfile: top functions by cumulative time")
+        st.dataframe(pd.DataFrame(selected["profile"]), use_container_width=True)
+
+# --------------------
+# Aggregates from the log
+# --------------------
+st.subheader("Latency by page and span")
+log_path = current["log_path"]
+limit = st.number_input("Reruns to aggregate (most recent)", 100, 1_000_000, 10_000, 100)
+records = instrumentation.load_log(log_path, limit=int(limit)) if log_path else reruns
+if log_path and os.path.exists(log_path):
+    st.caption(f"{len(records):,} reruns from {log_path} ({os.path.getsize(log_path) / 1024:.0f} KB)")
+st.dataframe(instrumentation.summarize(records), use_container_width=True)
+
+with st.expander("All spans in this process, including background threads"):
+    st.dataframe(pd.DataFrame(instrumentation.span_totals()).T, use_container_width=True)
+
+with st.expander("Lazy import times"):
+    st.dataframe(pd.Series(lazy_imports.import_times(), name="seconds").sort_values(ascending=False))
+
+if st.button("Clear in-memory results"):
+    instrumentation.reset()
+    st.rerun()
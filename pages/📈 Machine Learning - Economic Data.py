@@ -1,127 +1,277 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
-from sklearn.metrics import mean_squared_error, accuracy_score
-from sklearn.feature_selection import SelectKBest, f_regression, chi2
-import shap
 import joblib
-import matplotlib.pyplot as plt
-import seaborn as sns
-import sqlite3
-
-st.set_page_config(page_title="📈 Machine Learning - Economic Data", layout="wide")
-st.title("📈 Machine Learning on Economic Data")
-
-# Connect to SQLite DB and create table if not exists
-conn = sqlite3.connect("ml_models.db")
-cursor = conn.cursor()
-cursor.execute("""
-    CREATE TABLE IF NOT EXISTS model_metrics (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        target TEXT,
-        features TEXT,
-        problem_type TEXT,
-        metric_value REAL,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-    )
-""")
-
-uploaded_file = st.file_uploader("Upload a CSV file", type="csv")
+import hashlib
+import time
+import os
+import ml_engines
+import batch_scoring
+from experiments import ExperimentStore
+import instrumentation
+from lazy_imports import lazy, warm_up
 
-if uploaded_file:
-    df = pd.read_csv(uploaded_file)
-    st.write("## Preview of Data")
-    st.dataframe(df.head())
-
-    numeric_cols = df.select_dtypes(include=np.number).columns.tolist()
-    if len(numeric_cols) < 2:
-        st.warning("Please upload a dataset with at least two numeric columns.")
-    else:
-        target = st.selectbox("🎯 Select target variable (Y)", numeric_cols)
-        features = st.multiselect("🧮 Select feature variables (X)", [col for col in numeric_cols if col != target])
-
-        if st.checkbox("🔎 Use auto-feature selection"):
-            k = st.slider("Number of top features to select", 1, len(features), min(3, len(features)))
-            score_func = f_regression if df[target].nunique() > 2 else chi2
-            selector = SelectKBest(score_func=score_func, k=k)
-            X_selected = selector.fit_transform(df[features], df[target])
-            selected_features = [features[i] for i in selector.get_support(indices=True)]
-            st.write("Selected Features:", selected_features)
+# Heavy libraries load on the code path that needs them (or in the background, see the end of the page)
+model_selection = lazy("sklearn.model_selection")
+sk_metrics = lazy("sklearn.metrics")
+feature_selection = lazy("sklearn.feature_selection")
+shap = lazy("shap")
+plt = lazy("matplotlib.pyplot")
+sns = lazy("seaborn")
+
+with instrumentation.rerun("Machine Learning"):
+    st.set_page_config(page_title="📈 Machine Learning - Economic Data", layout="wide")
+    st.title("📈 Machine Learning on Economic Data")
+
+
+
+    # One experiment store per process, shared by all sessions
+    @st.cache_resource
+    def get_experiment_store():
+        return ExperimentStore("ml_models.db")
+
+
+    store = get_experiment_store()
+
+    uploaded_file = st.file_uploader("Upload a CSV file", type="csv")
+
+
+    # Binned training matrices and fitted models are cached per dataset/split/settings,
+    # so widget reruns reuse them instead of refitting.
+    @st.cache_resource(max_entries=4, show_spinner=False)
+    def get_training_matrix(split_key, _X_train, _y_train, engine, problem_type, max_bin, n_jobs):
+        with instrumentation.span("prepare_training_matrix", "parse"):
+            return ml_engines.prepare_training_matrix(engine, problem_type, _X_train, _y_train,
+                                                      max_bin=max_bin, n_jobs=n_jobs)
+
+
+    @st.cache_resource(max_entries=8, show_spinner="Training model...")
+    def train_model(split_key, _run_info, _matrix, _X_test, _y_test, engine, problem_type, max_bin, n_jobs,
+                    n_estimators, early_stopping_rounds):
+        start = time.perf_counter()
+        with instrumentation.span("fit_engine", "fit"):
+            model = ml_engines.fit_engine(_matrix, n_jobs=n_jobs, n_estimators=n_estimators,
+                                          early_stopping_rounds=early_stopping_rounds)
+        fit_seconds = time.perf_counter() - start
+        X_imp = _matrix.get("X_valid", _matrix["X_fit"])
+        y_imp = _matrix.get("y_valid", _matrix["y_fit"])
+        with instrumentation.span("feature_importances", "explain"):
+            importances = ml_engines.feature_importances(model, X_imp, y_imp, n_jobs=n_jobs)
+
+        y_pred = model.predict(_X_test)
+        if problem_type == "regression":
+            metrics = {"rmse": float(np.sqrt(sk_metrics.mean_squared_error(_y_test, y_pred)))}
         else:
-            selected_features = features
+            metrics = {"accuracy": float(sk_metrics.accuracy_score(_y_test, y_pred))}
 
-        if selected_features:
-            problem_type = st.radio("Select problem type", ["regression", "classification"])
-            test_size = st.slider("Test size (%)", 10, 50, 20)
+        # Only real fits reach this point; cached reruns are not logged again.
+        store.log_run(
+            target=_run_info["target"],
+            features=_run_info["features"],
+            problem_type=problem_type,
+            engine=engine,
+            metric_name=next(iter(metrics)),
+            metric_value=next(iter(metrics.values())),
+            fit_seconds=fit_seconds,
+            dataset_hash=_run_info["dataset_hash"],
+            params={"test_size": _run_info["test_size"], "n_jobs": n_jobs, "n_estimators": n_estimators,
+                    "early_stopping_rounds": early_stopping_rounds, "max_bin": _matrix.get("max_bin"),
+                    "best_iteration": getattr(model, "best_iteration", None) or getattr(model, "n_iter_", None)},
+            metrics=metrics,
+        )
+        return model, fit_seconds, importances, y_pred, metrics
 
-            X = df[selected_features]
-            y = df[target]
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size / 100, random_state=42)
 
-            if problem_type == "regression":
-                model = RandomForestRegressor()
-            else:
-                model = RandomForestClassifier()
+    # Refitting both engines on every widget change would pin a worker for minutes on large data
+    @st.cache_data(max_entries=8, show_spinner="Fitting engines...")
+    def compare_with_random_forest(split_key, _X_train, _y_train, engine, problem_type, max_bin, n_jobs,
+                                   n_estimators, early_stopping_rounds):
+        engines = [engine] if engine == ml_engines.RANDOM_FOREST else [engine, ml_engines.RANDOM_FOREST]
+        return ml_engines.compare_engines(engines, problem_type, _X_train, _y_train, n_jobs=n_jobs,
+                                          n_estimators=n_estimators, early_stopping_rounds=early_stopping_rounds,
+                                          max_bin=max_bin)
+
 
-            model.fit(X_train, y_train)
-            y_pred = model.predict(X_test)
+    if uploaded_file:
+        with instrumentation.span("read_csv", "parse"):
+            df = pd.read_csv(uploaded_file)
+        st.write("## Preview of Data")
+        st.dataframe(df.head())
 
-            st.subheader("📊 Evaluation Results")
-            if problem_type == "regression":
-                mse = mean_squared_error(y_test, y_pred)
-                rmse = np.sqrt(mse)
-                st.write(f"RMSE: {rmse:.2f}")
-                metric_value = rmse
+        numeric_cols = df.select_dtypes(include=np.number).columns.tolist()
+        if len(numeric_cols) < 2:
+            st.warning("Please upload a dataset with at least two numeric columns.")
+        else:
+            target = st.selectbox("🎯 Select target variable (Y)", numeric_cols)
+            features = st.multiselect("🧮 Select feature variables (X)", [col for col in numeric_cols if col != target])
+
+            if st.checkbox("🔎 Use auto-feature selection"):
+                k = st.slider("Number of top features to select", 1, len(features), min(3, len(features)))
+                score_func = feature_selection.f_regression if df[target].nunique() > 2 else feature_selection.chi2
+                selector = feature_selection.SelectKBest(score_func=score_func, k=k)
+                X_selected = selector.fit_transform(df[features], df[target])
+                selected_features = [features[i] for i in selector.get_support(indices=True)]
+                st.write("Selected Features:", selected_features)
             else:
-                acc = accuracy_score(y_test, y_pred)
-                st.write(f"Accuracy: {acc:.2f}")
-                metric_value = acc
-
-            # Save to DB
-            cursor.execute(
-                "INSERT INTO model_metrics (target, features, problem_type, metric_value) VALUES (?, ?, ?, ?)",
-                (target, ','.join(selected_features), problem_type, metric_value)
-            )
-            conn.commit()
-
-            # Charts
-            st.subheader("📈 Feature Importance")
-            importances = model.feature_importances_
-            fig, ax = plt.subplots()
-            sns.barplot(x=importances, y=selected_features, ax=ax)
-            ax.set_title("Feature Importance")
-            st.pyplot(fig)
-
-            # SHAP Explainability
-            st.subheader("🔍 Model Interpretability (SHAP)")
-            explainer = shap.TreeExplainer(model)
-            shap_values = explainer.shap_values(X_test)
-
-            # Create matplotlib figure for SHAP summary plot
-            fig_shap = plt.figure()
-            shap.summary_plot(shap_values, X_test, show=False, plot_type="bar")
-            st.pyplot(fig_shap)
-
-            if st.checkbox("📊 Run cross-validation"):
-                k = st.slider("Number of folds", 2, 10, 5)
-                score_type = "neg_root_mean_squared_error" if problem_type == "regression" else "accuracy"
-                cv_scores = cross_val_score(model, X, y, cv=k, scoring=score_type)
-                st.write(f"Mean CV Score: {np.abs(cv_scores.mean()):.2f}")
-                st.write("All CV Scores:", np.round(np.abs(cv_scores), 2))
-
-            joblib.dump(model, "trained_model.pkl")
-            with open("trained_model.pkl", "rb") as f:
-                st.download_button("📦 Download Trained Model", f, file_name="model.pkl")
-
-            st.markdown("---")
-            st.subheader("🧠 Try a Quiz: Predict the Target")
-            sample = df.sample(1)
-            st.write("Guess the target for this observation:")
-            st.write(sample[selected_features])
-            guess = st.number_input("Your guess for the target value:", format="%.2f")
-            actual = sample[target].values[0]
-            if st.button("Submit Guess"):
-                st.success(f"Actual: {actual}, Your guess: {guess}")
-                st.write(f"Error: {abs(guess - actual):.2f}")
+                selected_features = features
+
+            if selected_features:
+                problem_type = st.radio("Select problem type", ["regression", "classification"])
+                test_size = st.slider("Test size (%)", 10, 50, 20)
+
+                engine = st.selectbox("⚙️ Model engine", ml_engines.available_engines())
+                with st.expander("🔧 Engine settings"):
+                    max_threads = ml_engines.default_threads()
+                    n_jobs = st.slider("CPU threads", 1, max(max_threads, 2), max_threads)
+                    n_estimators, early_stopping_rounds, max_bin = 500, 20, 255
+                    if engine != ml_engines.RANDOM_FOREST:
+                        n_estimators = st.slider("Max boosting rounds", 50, 2000, 500, 50)
+                        early_stopping_rounds = st.slider("Early stopping patience (rounds)", 5, 100, 20)
+                        max_bin = st.slider("Histogram bins", 16, 255, 255)
+
+                X = df[selected_features]
+                y = df[target]
+                X_train, X_test, y_train, y_test = model_selection.train_test_split(
+                    X, y, test_size=test_size / 100, random_state=42)
+
+                dataset_hash = hashlib.sha1(uploaded_file.getvalue()).hexdigest()
+                split_key = f"{dataset_hash}|{target}|{','.join(selected_features)}|{test_size}"
+                matrix = get_training_matrix(split_key, X_train, y_train, engine, problem_type, max_bin, n_jobs)
+                run_info = {"dataset_hash": dataset_hash, "target": target, "features": selected_features,
+                            "test_size": test_size}
+                model, fit_seconds, importances, y_pred, metrics = train_model(
+                    split_key, run_info, matrix, X_test, y_test, engine, problem_type, max_bin, n_jobs,
+                    n_estimators, early_stopping_rounds)
+
+                st.subheader("📊 Evaluation Results")
+                if problem_type == "regression":
+                    st.write(f"RMSE: {metrics['rmse']:.2f}")
+                else:
+                    st.write(f"Accuracy: {metrics['accuracy']:.2f}")
+                st.caption(f"{engine}: fit in {fit_seconds:.2f}s"
+                           + (f", best iteration {model.best_iteration}" if getattr(model, "best_iteration", None) is not None else "")
+                           + (f", {model.n_iter_} iterations" if hasattr(model, "n_iter_") else ""))
+
+                # Charts
+                st.subheader("📈 Feature Importance")
+                with instrumentation.span("importance_chart", "render"):
+                    fig, ax = plt.subplots()
+                    sns.barplot(x=importances, y=selected_features, ax=ax)
+                    ax.set_title("Feature Importance")
+                    st.pyplot(fig)
+
+                # SHAP Explainability
+                st.subheader("🔍 Model Interpretability (SHAP)")
+                X_explain = X_test.sample(min(len(X_test), 2000), random_state=42)
+                try:
+                    with instrumentation.span("shap_values", "explain"):
+                        explainer = shap.TreeExplainer(ml_engines.explainable_model(model))
+                        shap_values = explainer.shap_values(X_explain)
+
+                    # Create matplotlib figure for SHAP summary plot
+                    with instrumentation.span("shap_summary_plot", "render"):
+                        fig_shap = plt.figure()
+                        shap.summary_plot(shap_values, X_explain, show=False, plot_type="bar")
+                        st.pyplot(fig_shap)
+                except Exception as e:
+                    st.info(f"SHAP is not available for this model: {e}")
+
+                if st.checkbox("⏱️ Compare fit time and memory with Random Forest"):
+                    with instrumentation.span("compare_engines", "fit"):
+                        comparison = compare_with_random_forest(split_key, X_train, y_train, engine, problem_type,
+                                                                max_bin, n_jobs, n_estimators, early_stopping_rounds)
+                    st.dataframe(comparison)
+                    st.caption("Each engine is fitted once in a fresh process; peak memory is its RSS growth.")
+                    st.bar_chart(comparison.set_index("engine")[["fit_seconds", "peak_memory_mb"]])
+
+                if st.checkbox("📊 Run cross-validation"):
+                    k = st.slider("Number of folds", 2, 10, 5)
+                    with instrumentation.span("cross_validation", "fit"):
+                        cv_scores = ml_engines.cross_validate_engine(engine, problem_type, X, y, cv=k, n_jobs=n_jobs,
+                                                                     n_estimators=n_estimators,
+                                                                     early_stopping_rounds=early_stopping_rounds,
+                                                                     max_bin=max_bin)
+                    st.write(f"Mean CV Score: {np.abs(cv_scores.mean()):.2f}")
+                    st.write("All CV Scores:", np.round(np.abs(cv_scores), 2))
+
+                joblib.dump(model, "trained_model.pkl")
+                with open("trained_model.pkl", "rb") as f:
+                    st.download_button("📦 Download Trained Model", f, file_name="model.pkl")
+                if st.button("📌 Register model for batch scoring"):
+                    path = batch_scoring.register_model(model, target, selected_features, problem_type, engine)
+                    st.success(f"Registered {path}")
+
+                st.markdown("---")
+                st.subheader("🧠 Try a Quiz: Predict the Target")
+                sample = df.sample(1)
+                st.write("Guess the target for this observation:")
+                st.write(sample[selected_features])
+                guess = st.number_input("Your guess for the target value:", format="%.2f")
+                actual = sample[target].values[0]
+                if st.button("Submit Guess"):
+                    st.success(f"Actual: {actual}, Your guess: {guess}")
+                    st.write(f"Error: {abs(guess - actual):.2f}")
+
+    st.markdown("---")
+    with st.expander("🗂️ Experiment history"):
+        known_targets = store.targets()
+        if not known_targets:
+            st.info("No runs recorded yet.")
+        else:
+            history_target = st.selectbox("Target", known_targets, key="history_target")
+            st.write("### Compare engines and feature sets")
+            st.dataframe(store.compare(history_target))
+
+            # Keyset paging: remember the smallest id shown and fetch runs older than it
+            if st.session_state.get("history_for") != history_target:
+                st.session_state.history_for = history_target
+                st.session_state.history_before = None
+            runs = store.query_runs(target=history_target, before_id=st.session_state.history_before, limit=50)
+            st.write("### Runs")
+            st.dataframe(runs)
+            col_newest, col_older = st.columns(2)
+            if col_newest.button("⏮️ Newest runs"):
+                st.session_state.history_before = None
+                st.rerun()
+            if len(runs) == 50 and col_older.button("Older runs ▶️"):
+                st.session_state.history_before = int(runs["id"].min())
+                st.rerun()
+
+    with st.expander("🚚 Batch scoring"):
+        registered = batch_scoring.list_models()
+        if not registered:
+            st.info("Register a trained model first.")
+        else:
+            model_path = st.selectbox("Registered model", registered, format_func=os.path.basename)
+            server_files = batch_scoring.list_inputs()
+            source_path = st.selectbox(
+                "CSV on the server (for very large files)", [None] + server_files,
+                format_func=lambda p: "—" if p is None else os.path.basename(p),
+                help=f"Files copied into {batch_scoring.INPUTS_DIR}/ on the server.")
+            source_upload = st.file_uploader("...or upload a CSV", type="csv", key="score_upload")
+            col_fmt, col_chunk, col_workers = st.columns(3)
+            out_fmt = col_fmt.selectbox("Output format", ["parquet", "csv"] if batch_scoring.pq else ["csv"])
+            chunksize = col_chunk.number_input("Rows per chunk", 10_000, 1_000_000, 100_000, 10_000)
+            # max() keeps the slider valid on single-CPU hosts (min must be below max)
+            workers = col_workers.slider("Worker processes", 1, max(ml_engines.default_threads(), 2),
+                                         ml_engines.default_threads())
+
+            source = source_path or source_upload
+            if source and st.button("▶️ Score file"):
+                output_path = batch_scoring.output_path_for(model_path, out_fmt)
+                bar = st.progress(0.0, text="Scoring...")
+                with instrumentation.span("batch_scoring", "fit"):
+                    stats = batch_scoring.score_file(
+                        model_path, source, output_path, fmt=out_fmt, chunksize=int(chunksize), workers=workers,
+                        progress=lambda n, s, f: bar.progress(f, text=f"{n:,} rows scored — {n / s:,.0f} rows/s"),
+                    )
+                bar.progress(1.0, text="Done")
+                st.success(f"Scored {stats['rows']:,} rows in {stats['seconds']:.1f}s "
+                           f"({stats['rows_per_second']:,.0f} rows/s) → {output_path}")
+                if os.path.getsize(output_path) < 200 * 1024 * 1024:
+                    with open(output_path, "rb") as f:
+                        st.download_button("📥 Download predictions", f, file_name=os.path.basename(output_path))
+
+# After first paint, import what training and explaining will need so the first click is fast
+if uploaded_file:
+    warm_up("sklearn.ensemble", "sklearn.inspection", "shap", "seaborn")
@@ -0,0 +1,71 @@
+# retrieval.py
+# BM25 keyword retrieval over course documents for the FAQ bot.
+import hashlib
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def document_hash(text):
+    return hashlib.sha1(text.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.casefold()) if len(t) > 1]
+
+
+def chunk_text(text, chunk_size=1000, overlap=200):
+    chunks, start = [], 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        chunks.append(text[start:end])
+        if end == len(text):
+            break
+        start = end - overlap
+    return chunks
+
+
+class BM25Index:
+    """Inverted index over document chunks, scored with Okapi BM25.
+
+    Built once per document; a query only touches the postings of its own
+    terms and keeps the best `top_k` chunks with a heap.
+    """
+
+    def __init__(self, chunks, k1=1.5, b=0.75):
+        self.chunks = chunks
+        self.k1, self.b = k1, b
+        self.postings = defaultdict(list)  # term -> [(chunk_id, term_frequency)]
+        self.doc_lengths = []
+        for chunk_id, chunk in enumerate(chunks):
+            counts = Counter(tokenize(chunk))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((chunk_id, tf))
+        n = len(chunks)
+        self.avg_length = (sum(self.doc_lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for term, plist in self.postings.items()
+        }
+
+    @classmethod
+    def from_text(cls, text, chunk_size=1000, overlap=200):
+        return cls(chunk_text(text, chunk_size, overlap))
+
+    def search(self, question, top_k=5):
+        """Return up to top_k (score, chunk) pairs, best first."""
+        scores = defaultdict(float)
+        k1, b, avg = self.k1, self.b, self.avg_length or 1.0
+        for term in set(tokenize(question)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for chunk_id, tf in self.postings[term]:
+                norm = k1 * (1 - b + b * self.doc_lengths[chunk_id] / avg)
+                scores[chunk_id] += idf * tf * (k1 + 1) / (tf + norm)
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(score, self.chunks[chunk_id]) for chunk_id, score in best]
@@ -0,0 +1,141 @@
+# tests/test_llm_gateway_stream.py
+# PoeBackend.stream and the LLMStream timing fields against the local stub server.
+#
+#   python -m pytest tests
+import os
+import sys
+import unittest
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import stub_poe_server  # noqa: E402
+from llm_gateway import Gateway, PoeBackend  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "What is price elasticity?"}]
+
+
+def delta(text):
+    return {"choices": [{"index": 0, "delta": {"content": text}}]}
+
+
+class StreamTestCase(unittest.TestCase):
+    def start_stub(self, first_token_delay=0.0, token_delay=0.0, **options):
+        server, url = stub_poe_server.start(first_token_delay=first_token_delay, token_delay=token_delay,
+                                            **options)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server, url
+
+    def gateway(self, **kwargs):
+        backend = PoeBackend()
+        self.addCleanup(backend.session.close)
+        return Gateway([backend], backoff_base=0.01, backoff_cap=0.05, timeout=10, **kwargs)
+
+
+class PoeBackendStreamTest(StreamTestCase):
+    def stream(self, url):
+        usage = {}
+        deltas = list(PoeBackend().stream("stub", MESSAGES, usage, api_key="test", url=url))
+        return deltas, usage
+
+    def test_yields_the_answer_word_by_word(self):
+        _, url = self.start_stub()
+        deltas, _ = self.stream(url)
+        self.assertEqual("".join(deltas), stub_poe_server.DEFAULT_ANSWER)
+        self.assertEqual(len(deltas), len(stub_poe_server.DEFAULT_ANSWER.split(" ")))
+
+    def test_utf8_split_across_network_chunks(self):
+        # 3-byte chunks cut every Arabic (2-byte) and emoji (4-byte) character in half
+        answer = "مرونة الطلب السعرية 📈 élasticité"
+        _, url = self.start_stub(answer=answer, chunk_bytes=3)
+        deltas, _ = self.stream(url)
+        self.assertEqual("".join(deltas), answer)
+
+    def test_stops_at_done(self):
+        _, url = self.start_stub(events=[delta("Hello"), delta(" world"), "[DONE]", delta(" ignored")])
+        deltas, _ = self.stream(url)
+        self.assertEqual(deltas, ["Hello", " world"])
+
+    def test_skips_empty_and_usage_only_events(self):
+        events = [
+            {"choices": [{"index": 0, "delta": {"role": "assistant"}}]},
+            "",
+            delta(""),
+            delta("Hi"),
+            {"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]},
+            {"choices": [], "usage": {"prompt_tokens": 12, "completion_tokens": 1}},
+            "[DONE]",
+        ]
+        _, url = self.start_stub(events=events)
+        deltas, usage = self.stream(url)
+        self.assertEqual(deltas, ["Hi"])
+        self.assertEqual(usage, {"prompt_tokens": 12, "completion_tokens": 1})
+
+    def test_http_error_raises_before_any_delta(self):
+        _, url = self.start_stub(fail_first=1, fail_status=401)
+        with self.assertRaises(requests.HTTPError) as ctx:
+            self.stream(url)
+        self.assertEqual(ctx.exception.response.status_code, 401)
+
+
+class LLMStreamTest(StreamTestCase):
+    def test_timing_fields(self):
+        answer = "one two three four five"
+        _, url = self.start_stub(first_token_delay=0.2, token_delay=0.05, answer=answer)
+        s = self.gateway().stream("poe", "stub", MESSAGES, api_key="test", url=url)
+        self.assertIsNone(s.time_to_first_token)
+        self.assertIsNone(s.total_seconds)
+        deltas = list(s)
+        self.assertEqual("".join(deltas), answer)
+        self.assertEqual(s.text, answer)
+        self.assertGreaterEqual(s.time_to_first_token, 0.2)
+        # Four more words follow the first, 50 ms apart
+        self.assertGreaterEqual(s.total_seconds - s.time_to_first_token, 4 * 0.05)
+
+    def test_retries_errors_before_the_first_token(self):
+        server, url = self.start_stub(fail_first=2, fail_status=503, answer="recovered")
+        gateway = self.gateway(max_retries=3)
+        s = gateway.stream("poe", "stub", MESSAGES, api_key="test", url=url)
+        self.assertEqual("".join(s), "recovered")
+        self.assertEqual(server.RequestHandlerClass.requests_seen, 3)
+        # Time to first token includes the failed attempts
+        self.assertGreaterEqual(s.total_seconds, s.time_to_first_token)
+        metrics = gateway.metrics()["poe"]
+        self.assertEqual((metrics["calls"], metrics["errors"], metrics["retries"]), (1, 0, 2))
+
+    def test_gives_up_after_max_retries(self):
+        server, url = self.start_stub(fail_first=10, fail_status=503)
+        gateway = self.gateway(max_retries=2)
+        s = gateway.stream("poe", "stub", MESSAGES, api_key="test", url=url)
+        with self.assertRaises(requests.HTTPError):
+            list(s)
+        self.assertEqual(server.RequestHandlerClass.requests_seen, 3)
+        self.assertIsNone(s.time_to_first_token)
+        self.assertIsNotNone(s.total_seconds)
+        self.assertEqual(s.text, "")
+        self.assertEqual(gateway.metrics()["poe"]["errors"], 1)
+
+    def test_non_retryable_error_is_not_retried(self):
+        server, url = self.start_stub(fail_first=1, fail_status=400)
+        s = self.gateway().stream("poe", "stub", MESSAGES, api_key="test", url=url)
+        with self.assertRaises(requests.HTTPError):
+            list(s)
+        self.assertEqual(server.RequestHandlerClass.requests_seen, 1)
+        self.assertIsNone(s.time_to_first_token)
+
+    def test_error_after_first_token_is_not_retried(self):
+        server, url = self.start_stub(events=[delta("partial"), delta(" answer"), "[DONE]"], abort_after=1)
+        s = self.gateway().stream("poe", "stub", MESSAGES, api_key="test", url=url)
+        with self.assertRaises(requests.RequestException):
+            list(s)
+        self.assertEqual(s.text, "partial")
+        self.assertIsNotNone(s.time_to_first_token)
+        self.assertEqual(server.RequestHandlerClass.requests_seen, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()